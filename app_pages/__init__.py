@@ -0,0 +1,6 @@
+"""Pages of the Streamlit dashboard, run through ``st.navigation`` in ``streamlit_app.py``.
+
+Each page script imports what it needs when it runs, so a rerun only pays for
+the active page; shared helpers live in :mod:`app_pages.session` (light, used by
+the login page) and :mod:`app_pages.data` (data loading and analysis).
+"""
@@ -0,0 +1,61 @@
+"""Dashboard page: KPIs, revenue/cost trend and AI analysis."""
+import plotly.express as px
+import streamlit as st
+
+from app_pages.data import analysis_section, currency_select, traced_fragment, uploaded_data
+from finance.downsample import downsample
+from finance.rollups import rollups_for
+from finance.sample_data import generate_financial_data
+from finance.telemetry import span
+from finance.timeindex import filter_date_range
+
+filters = st.session_state['filters']
+date_start, date_end = filters['date_start'], filters['date_end']
+
+st.title("Финансовый дашборд")
+
+# Sample data or user data
+uploaded = uploaded_data()
+if uploaded is not None and 'Revenue' in uploaded.columns:
+    financial_data = uploaded
+    st.success("Используются загруженные данные")
+else:
+    financial_data = generate_financial_data(start_date=date_start)
+    st.info("Используются сгенерированные данные")
+
+financial_data = filter_date_range(financial_data, date_start, date_end)
+if financial_data.empty:
+    st.warning("Нет данных за выбранный период")
+    st.stop()
+
+# Key metrics; changing the currency reruns only this fragment
+@traced_fragment
+def key_metrics(kpis):
+    currency = currency_select()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label="Выручка", value=f"{kpis['Revenue']['total']:,.0f} {currency}", delta=f"{kpis['Revenue']['change_pct']:.1f}%")
+    with col2:
+        st.metric(label="Расходы", value=f"{kpis['Costs']['total']:,.0f} {currency}", delta=f"{kpis['Costs']['change_pct']:.1f}%")
+    with col3:
+        st.metric(label="Прибыль", value=f"{kpis['Profit']['total']:,.0f} {currency}", delta=f"{kpis['Profit']['change_pct']:.1f}%")
+    with col4:
+        st.metric(label="Маржа", value=f"{kpis['Margin']['total']:.1f}%", delta=f"{kpis['Margin']['change_pp']:.1f} п.п.")
+
+key_metrics(rollups_for(financial_data).kpis())
+
+# Charts
+st.subheader("Выручка и расходы")
+with span("figure", chart="dashboard_trend"):
+    fig = px.line(
+        downsample(financial_data, "Date", ["Revenue", "Costs", "Profit"]),
+        x="Date",
+        y=["Revenue", "Costs", "Profit"],
+        title="Финансовые показатели"
+    )
+with span("render", chart="dashboard_trend"):
+    st.plotly_chart(fig, use_container_width=True)
+
+# AI Analysis
+st.subheader("ИИ-анализ данных")
+analysis_section('financial', financial_data, "Выполнить ИИ-анализ", "Анализируем данные...")
@@ -0,0 +1,275 @@
+"""Data source handling, analysis runs and the admin timing panel for logged-in pages."""
+import functools
+import io
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from app_pages.session import get_user_data_path
+from finance import datasets, export, ingest, jobs, storage, telemetry, templates, workers
+from finance.cache import dataset_cache, dataset_fingerprint, stream_hash
+from finance.telemetry import span
+
+CURRENCIES = ["₸", "USD", "EUR"]
+
+
+# Point the session at a shared dataset. The session keeps a handle that pins
+# the dataset in the process-wide cache, not a copy of its own.
+def use_dataset(key, df=None):
+    handle = st.session_state.get('dataset')
+    if handle is None or handle.key != key:
+        if handle is not None:
+            handle.release()
+        handle = dataset_cache.acquire(key, df)
+        st.session_state['dataset'] = handle
+    return handle.frame
+
+# st.fragment whose reruns of its own are traced separately from the page's full reruns
+def traced_fragment(func=None, *, run_every=None):
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with telemetry.fragment_rerun(st.session_state, func.__name__):
+                return func(*args, **kwargs)
+        return st.fragment(run, run_every=run_every)
+    return decorate(func) if func is not None else decorate
+
+# The session's uploaded or saved dataset, or None to use sample data
+def uploaded_data():
+    handle = st.session_state.get('dataset')
+    return handle.frame if handle is not None else None
+
+# Function to handle file upload and save to user's directory
+def handle_file_upload():
+    uploaded_file = st.file_uploader("Загрузить финансовые данные (CSV, Excel)", type=["csv", "xlsx", "xls"])
+
+    if uploaded_file is not None:
+        try:
+            # The uploader keeps its file across reruns, so parse each distinct content once
+            data_hash = stream_hash(uploaded_file)
+            df = dataset_cache.get(data_hash)
+            if df is None:
+                # Parse in the background; the job gets its own copy of the bytes
+                # since the uploader's buffer is read again on the next rerun
+                data, name = uploaded_file.getvalue(), uploaded_file.name
+                job = jobs.submit(
+                    "upload",
+                    lambda progress: ingest.ingest(io.BytesIO(data), name, progress=progress),
+                    key=f"upload:{data_hash}",
+                    label=name
+                )
+                if not jobs.wait(job, jobs.INLINE_SECONDS):
+                    job_progress(job.id, "Обработка файла...")
+                    return None
+                df, stats = job.result()
+                if stats['rows_dropped']:
+                    st.warning(f"Пропущено строк с некорректными данными: {stats['rows_dropped']} из {stats['rows_read']}")
+                if stats['partial_through'] is not None:
+                    st.info(f"Последний месяц неполный (данные по {stats['partial_through']:%d.%m.%Y}) и не участвует в сравнении месяцев")
+                if stats['bytes_after'] < stats['bytes_before']:
+                    st.caption(f"Память: {stats['bytes_before'] / 2**20:.1f} МБ → {stats['bytes_after'] / 2**20:.1f} МБ после сжатия типов")
+                dataset_cache.put(data_hash, df)
+                # The frame now lives in the cache, under its byte budget
+                jobs.forget(job)
+
+            # A file can start a new dataset or add rows to a saved one
+            user_dir = get_user_data_path(st.session_state['user_id'])
+            entries = catalog_page(user_dir, st, 'upload')
+            target = st.selectbox(
+                "Сохранить как:",
+                [None] + list(entries),
+                format_func=lambda dataset_id: "Новый набор данных" if dataset_id is None else f"Дополнить: {entries[dataset_id]['name']}"
+            )
+
+            # Save to the user's columnar store; identical uploads are stored once
+            key = data_hash
+            if st.session_state.get('saved_upload') != (data_hash, target):
+                if target is None:
+                    storage.save_dataset(user_dir, df, uploaded_file.name, data_hash=data_hash)
+                else:
+                    entry, df = datasets.append(user_dir, target, df, data_hash=data_hash)
+                    key = datasets.version_key(entry)
+                st.session_state['saved_upload'] = (data_hash, target)
+            elif target is not None:
+                entry = storage.get_dataset(user_dir, target)
+                df = datasets.load(user_dir, entry)
+                key = datasets.version_key(entry)
+            df = use_dataset(key, df)
+
+            st.success(f"Файл успешно загружен и сохранен!")
+            return df
+        except Exception as e:
+            st.error(f"Ошибка при загрузке файла: {str(e)}")
+
+    return None
+
+# Search box and pager over the user's catalog; returns the entries of the current page by id
+def catalog_page(user_dir, container, key):
+    entries, total = storage.search_datasets(user_dir)
+    if total <= storage.CATALOG_PAGE_SIZE:
+        return {entry['id']: entry for entry in entries}
+
+    query = container.text_input("Поиск по названию", key=f'{key}-catalog-query')
+    _, total = storage.search_datasets(user_dir, query, limit=0)
+    pages = max(1, -(-total // storage.CATALOG_PAGE_SIZE))
+    page = container.number_input(f"Страница (из {pages})", 1, pages, 1, key=f'{key}-catalog-page') if pages > 1 else 1
+    entries, _ = storage.search_datasets(user_dir, query, (page - 1) * storage.CATALOG_PAGE_SIZE)
+    return {entry['id']: entry for entry in entries}
+
+def dataset_label(entry):
+    label = f"{entry['name']} v{entry.get('version', 1)} ({entry.get('updated', entry['created'])}, {entry['rows']} строк"
+    if entry.get('date_start'):
+        label += f", {entry['date_start']} — {entry['date_end']}"
+    return label + ")"
+
+# Function to load user's saved data files
+def load_user_data():
+    user_dir = get_user_data_path(st.session_state['user_id'])
+    entries = catalog_page(user_dir, st.sidebar, 'saved')
+
+    if not entries:
+        return None
+
+    labels = {dataset_id: dataset_label(entry) for dataset_id, entry in entries.items()}
+    selected_id = st.sidebar.selectbox("Выберите сохраненный файл:", list(labels), format_func=labels.get)
+
+    if selected_id:
+        entry = entries[selected_id]
+        return use_dataset(datasets.version_key(entry), datasets.load(user_dir, entry))
+
+    return None
+
+# Start an analysis as a background job of the session; its result lands in analysis_results.
+# The analysis is timed on the job thread; collecting it adds that time to the rerun showing it.
+def run_analysis(key, df):
+    def analyze(progress):
+        with span("analysis", kind=key):
+            return workers.submit(key, df).result()
+
+    job = jobs.submit("analysis", analyze, key=f"{key}:{dataset_fingerprint(df)}")
+    jobs.track(st.session_state, key, job)
+    if jobs.wait(job, jobs.INLINE_SECONDS):
+        jobs.collect(st.session_state)
+
+# Progress of a running job, polled on its own until the job finishes; then the
+# whole page reruns once to show the result and stop polling
+@traced_fragment(run_every=jobs.POLL_SECONDS)
+def job_progress(job_id, text):
+    job = jobs.get(job_id)
+    if job is None or job.done():
+        st.rerun()
+    st.progress(job.progress, text=text)
+
+# Currency picker for fragments that format money. Widget state is dropped on
+# pages that don't render the widget, so the choice is kept under a plain key.
+def currency_select():
+    current = st.session_state.get('currency', CURRENCIES[0])
+    st.session_state['currency'] = st.selectbox("Валюта", CURRENCIES, index=CURRENCIES.index(current))
+    return st.session_state['currency']
+
+# Download of a dataset limited to the date filter. The file is produced only
+# when the button is clicked, and the same export is reused on later clicks.
+def export_section(df, stem, date_start=None, date_end=None, key='export'):
+    formats = export.available_formats(len(df))
+    fmt = st.selectbox(
+        "Формат", formats, format_func=lambda name: export.FORMATS[name][0], key=f'{key}-format'
+    )
+
+    def export_bytes():
+        with span("export", format=fmt):
+            return export.export_bytes(df, fmt, date_start, date_end)
+
+    st.download_button(
+        "Скачать данные",
+        export_bytes,
+        export.file_name(stem, fmt),
+        export.mime_type(fmt),
+        key=f'{key}-download',
+        on_click='ignore'
+    )
+
+# AI analysis block; clicking its button reruns only this fragment. The analysis
+# keeps running when the user leaves the page and its result is shown on return.
+@traced_fragment
+def analysis_section(key, df, button_label, spinner_text):
+    if st.button(button_label):
+        run_analysis(key, df)
+
+    job = jobs.session_job(st.session_state, key)
+    if job is not None and not job.done():
+        job_progress(job.id, spinner_text)
+    elif job is not None and job.error() is not None:
+        st.error(f"Ошибка при анализе данных: {job.error()}")
+
+    # Results are rendered in the report language on display, so switching it needs no new analysis
+    if key in st.session_state['analysis_results']:
+        locale = st.session_state.get('locale', templates.DEFAULT_LOCALE)
+        for text in templates.render(st.session_state['analysis_results'][key], locale).values():
+            st.markdown(text)
+
+# Admin panel with the timing breakdown of the session's last reruns
+def show_timing_panel():
+    history = st.session_state.get('telemetry_history', [])
+    if history:
+        rows = []
+        for record in reversed(history):
+            row = {
+                "Время": datetime.fromtimestamp(record['started']).strftime('%H:%M:%S'),
+                "Страница": record.get('page', record.get('fragment', '')),
+                "Всего, мс": record['seconds'] * 1000,
+            }
+            row.update({name: seconds * 1000 for name, seconds in record['spans'].items()})
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    else:
+        st.caption("Нет данных о перезапусках")
+    st.caption(
+        f"Общий кэш наборов данных: {len(dataset_cache)} шт., {dataset_cache.nbytes / 2**20:.1f} МБ, "
+        f"из них используется сессиями {dataset_cache.pinned_nbytes / 2**20:.1f} МБ"
+    )
+    st.download_button(
+        "Метрики (OpenMetrics)",
+        telemetry.openmetrics_text(),
+        "metrics.txt",
+        "application/openmetrics-text",
+        key='download-metrics'
+    )
+
+
+# Sidebar filters and data source, shared by every page
+def render_sidebar():
+    st.sidebar.title("Фильтры")
+    date_range = st.sidebar.date_input(
+        "Временной период",
+        value=(datetime.now() - timedelta(days=365), datetime.now())
+    )
+    # The range picker returns a single date while the end date is still being chosen
+    st.session_state['filters'] = {
+        'date_start': date_range[0],
+        'date_end': date_range[1] if len(date_range) > 1 else None,
+    }
+
+    # Data source: upload new or use saved; pages fall back to generated sample data
+    st.sidebar.title("Источник данных")
+    data_source = st.sidebar.radio("Выберите источник:", ["Загрузить новый файл", "Использовать сохраненные", "Сгенерировать пример"])
+
+    # Handle data source selection
+    if data_source == "Загрузить новый файл":
+        with span("load_data", source="upload"):
+            handle_file_upload()
+    elif data_source == "Использовать сохраненные":
+        with span("load_data", source="saved"):
+            load_user_data()
+
+    # Language of the analysis texts; kept under a plain key like the currency
+    locales = list(templates.LOCALE_NAMES)
+    current = st.session_state.get('locale', templates.DEFAULT_LOCALE)
+    st.session_state['locale'] = st.sidebar.selectbox(
+        "Язык отчета", locales, index=locales.index(current), format_func=templates.LOCALE_NAMES.get
+    )
+
+    # Rerun timings, visible to the users listed in FINANCE_ADMINS
+    if telemetry.is_admin(st.session_state['user_id']):
+        with st.sidebar.expander("Производительность"):
+            show_timing_panel()
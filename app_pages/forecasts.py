@@ -0,0 +1,68 @@
+"""Forecasts page: Monte Carlo revenue scenarios and their analysis."""
+import plotly.express as px
+import streamlit as st
+
+from app_pages.data import analysis_section, traced_fragment
+from finance import workers
+from finance.telemetry import span
+
+st.title("Финансовые прогнозы")
+
+# Forecast inputs and everything derived from them; moving a slider reruns only this fragment
+@traced_fragment
+def forecast_section():
+    # Forecast parameters
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        base_revenue = st.number_input("Базовая выручка", min_value=10000, value=100000, step=10000)
+    with col2:
+        growth_optimistic = st.slider("Оптимистичный темп роста (%)", min_value=5, max_value=30, value=15)
+    with col3:
+        growth_conservative = st.slider("Консервативный темп роста (%)", min_value=1, max_value=15, value=5)
+
+    # Simulate forecast paths; scenarios are the P5/P50/P95 percentiles across paths
+    scenario_data = workers.submit(
+        "scenarios",
+        base_revenue=base_revenue,
+        growth_conservative=growth_conservative,
+        growth_optimistic=growth_optimistic
+    ).result()
+
+    # Display forecasts
+    st.subheader("Прогноз выручки по сценариям")
+    st.caption("Сценарии - 5-й, 50-й и 95-й процентили 100 000 смоделированных траекторий выручки")
+    with span("figure", chart="forecast_scenarios"):
+        fig = px.line(
+            scenario_data,
+            x="Date",
+            y=["Conservative", "Base Case", "Optimistic"],
+            title="Прогноз выручки по сценариям"
+        )
+    with span("render", chart="forecast_scenarios"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Cumulative revenue
+    st.subheader("Накопительная выручка")
+    cumulative_data = scenario_data.copy()
+    for col in ["Conservative", "Base Case", "Optimistic"]:
+        cumulative_data[f"{col} Cumulative"] = cumulative_data[col].cumsum()
+
+    with span("figure", chart="forecast_cumulative"):
+        fig = px.line(
+            cumulative_data,
+            x="Date",
+            y=["Conservative Cumulative", "Base Case Cumulative", "Optimistic Cumulative"],
+            title="Накопительная выручка по сценариям"
+        )
+    with span("render", chart="forecast_cumulative"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Data table
+    st.subheader("Прогнозные данные")
+    st.dataframe(scenario_data)
+
+    # AI Analysis
+    st.subheader("ИИ-анализ прогнозов")
+    analysis_section('forecasts', scenario_data, "Выполнить анализ прогнозов", "Анализируем прогнозные данные...")
+
+forecast_section()
@@ -0,0 +1,48 @@
+"""Login/Register page."""
+import streamlit as st
+
+from app_pages.session import get_user_hash, save_user, verify_user
+
+
+def show_login_page():
+    st.title("Вход в систему")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.header("Вход")
+        login_username = st.text_input("Имя пользователя", key="login_username")
+        login_password = st.text_input("Пароль", type="password", key="login_password")
+        login_button = st.button("Войти")
+
+        if login_button:
+            password_hash = get_user_hash(login_username, login_password)
+            if verify_user(login_username, password_hash):
+                st.session_state['user_id'] = login_username
+                st.session_state['page'] = "Dashboard"
+                st.rerun()
+            else:
+                st.error("Неверное имя пользователя или пароль")
+
+    with col2:
+        st.header("Регистрация")
+        register_username = st.text_input("Имя пользователя", key="register_username")
+        register_password = st.text_input("Пароль", type="password", key="register_password")
+        confirm_password = st.text_input("Подтвердите пароль", type="password")
+        register_button = st.button("Зарегистрироваться")
+
+        if register_button:
+            if register_password != confirm_password:
+                st.error("Пароли не совпадают")
+            elif len(register_username) < 3:
+                st.error("Имя пользователя должно содержать не менее 3 символов")
+            else:
+                password_hash = get_user_hash(register_username, register_password)
+                if save_user(register_username, password_hash):
+                    st.success("Вы успешно зарегистрировались! Теперь вы можете войти.")
+                else:
+                    st.error("Пользователь с таким именем уже существует")
+
+
+
+show_login_page()
@@ -0,0 +1,71 @@
+"""Profit and loss page: monthly P&L, year-over-year comparison, data export and analysis."""
+import plotly.express as px
+import streamlit as st
+
+from app_pages.data import analysis_section, export_section, uploaded_data
+from finance.rollups import rollups_for
+from finance.sample_data import generate_financial_data
+from finance.telemetry import span
+from finance.timeindex import filter_date_range
+
+filters = st.session_state['filters']
+date_start, date_end = filters['date_start'], filters['date_end']
+
+st.title("Отчет о прибылях и убытках")
+
+# Sample data or user data
+uploaded = uploaded_data()
+if uploaded is not None and 'Revenue' in uploaded.columns:
+    financial_data = uploaded
+else:
+    financial_data = generate_financial_data(start_date=date_start, periods=12)
+
+# Exports are cut from the whole dataset, so each version and filter is exported once
+source_data = financial_data
+financial_data = filter_date_range(financial_data, date_start, date_end)
+if financial_data.empty:
+    st.warning("Нет данных за выбранный период")
+    st.stop()
+
+rollups = rollups_for(financial_data)
+monthly_data = rollups.table("monthly")
+
+tab1, tab2 = st.tabs(["Графики", "Данные"])
+
+with tab1:
+    st.subheader("Ежемесячные P&L")
+    with span("figure", chart="pnl_monthly"):
+        fig = px.bar(
+            monthly_data,
+            x="Date",
+            y=["Revenue", "Costs", "Profit"],
+            barmode="group",
+            title="Ежемесячные доходы и расходы"
+        )
+    with span("render", chart="pnl_monthly"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # YoY comparison if we have data for multiple years
+    if len(monthly_data) > 13:
+        st.subheader("Сравнение год к году")
+        with span("figure", chart="pnl_yoy"):
+            fig = px.line(
+                rollups.year_over_year("Profit"),
+                x="Month",
+                y="Profit",
+                color="Year",
+                title="Сравнение прибыли по годам",
+                labels={"Month": "Месяц"}
+            )
+        with span("render", chart="pnl_yoy"):
+            st.plotly_chart(fig, use_container_width=True)
+
+with tab2:
+    st.dataframe(financial_data)
+
+    # Export option
+    export_section(source_data, "financial_data", date_start, date_end, key='pnl-export')
+
+# AI Analysis
+st.subheader("ИИ-анализ P&L")
+analysis_section('financial', financial_data, "Выполнить анализ P&L", "Анализируем P&L данные...")
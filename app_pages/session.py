@@ -0,0 +1,52 @@
+"""Session state, user accounts and per-user paths.
+
+Imported by the entry point and the login page, so it must stay free of
+pandas, plotly and the data modules.
+"""
+import hashlib
+from pathlib import Path
+
+import streamlit as st
+
+from finance.users import get_user_store
+
+# Create data directory if it doesn't exist
+DATA_DIR = Path("user_data")
+DATA_DIR.mkdir(exist_ok=True)
+
+PAGES = ["Дашборд", "Прибыли и убытки", "Юнит-экономика", "Прогнозы"]
+
+
+# User authentication functions
+def get_user_hash(username, password):
+    """Create a hash for the user's password."""
+    return hashlib.sha256(f"{username}:{password}".encode()).hexdigest()
+
+def save_user(username, password_hash):
+    """Save a new user to the users database; return False if the name is taken."""
+    return get_user_store(DATA_DIR).create_user(username, password_hash)
+
+def verify_user(username, password_hash):
+    """Check if the user exists and the password is correct."""
+    return get_user_store(DATA_DIR).verify_user(username, password_hash)
+
+def get_user_data_path(user_id):
+    """Get the path to the user's data directory; it is created on the first save."""
+    return DATA_DIR / user_id
+
+def init_session_state():
+    """Initialize session state."""
+    defaults = {
+        'user_id': None,
+        # Handle of the shared dataset in use (see app_pages.data.use_dataset)
+        'dataset': None,
+        'analysis_results': {},
+        'jobs': {},
+        'page': "Login",
+    }
+    for key, value in defaults.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+
+def is_logged_in():
+    return st.session_state['page'] != "Login" and st.session_state['user_id'] is not None
@@ -0,0 +1,119 @@
+"""Unit economics page: per-product metrics, comparison charts and analysis."""
+import plotly.express as px
+import streamlit as st
+
+from app_pages.data import analysis_section, currency_select, traced_fragment, uploaded_data
+from finance import consolidation
+from finance.sample_data import generate_unit_economics
+from finance.telemetry import span
+
+LEVEL_LABELS = {"Entity": "Юрлицо", "Category": "Категория", "Product": "Продукт"}
+# Catalogs up to this size are listed in full; larger ones are searched
+SELECT_LIMIT = 200
+BAR_GROUPS = 20
+SCATTER_POINTS = 500
+
+st.title("Анализ юнит-экономики")
+
+# Sample data or user data
+uploaded = uploaded_data()
+if uploaded is not None and 'Product' in uploaded.columns:
+    unit_data = uploaded
+else:
+    unit_data = generate_unit_economics()
+
+# Product selector and metrics; picking a product reruns only this fragment
+@traced_fragment
+def product_metrics(unit_data):
+    index = consolidation.product_index(unit_data)
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        if len(index) > SELECT_LIMIT:
+            query = st.text_input("Поиск продукта:", key='product-query')
+            products = index.search(query)
+        else:
+            products = index.search("", limit=len(index))
+        selected_product = st.selectbox("Выберите продукт:", products)
+    with col2:
+        currency = currency_select()
+
+    if selected_product is None:
+        st.info("Продукты не найдены")
+        return
+    product_data = unit_data.iloc[index.position(selected_product)]
+
+    # Display metrics
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label="Цена", value=f"{product_data['Price']:.2f} {currency}")
+    with col2:
+        st.metric(label="Себестоимость", value=f"{product_data['Cost']:.2f} {currency}")
+    with col3:
+        st.metric(label="Маржа", value=f"{product_data['Margin']:.2f} {currency}")
+    with col4:
+        st.metric(label="Маржа %", value=f"{product_data['Margin %']:.1f}%")
+
+product_metrics(unit_data)
+
+# Consolidation level; only offered when the data has entities or categories
+levels = consolidation.levels(unit_data)
+level = "Product"
+if len(levels) > 1:
+    level = st.radio("Уровень консолидации:", levels, format_func=LEVEL_LABELS.get, horizontal=True)
+with span("consolidate", level=level):
+    view = consolidation.consolidate(unit_data, level)
+level_label = LEVEL_LABELS[level]
+
+# Charts
+st.subheader("Сравнение продуктов" if level == "Product" else f"Сравнение: {level_label}")
+
+with span("figure", chart="unit_comparison"):
+    fig = px.bar(
+        consolidation.top_n(view, level, n=BAR_GROUPS),
+        x="Label",
+        y=["Price", "Cost", "Margin"],
+        barmode="group",
+        title=f"Цена, себестоимость и маржа ({level_label.lower()}, топ-{BAR_GROUPS} по выручке)",
+        labels={"Label": level_label}
+    )
+with span("render", chart="unit_comparison"):
+    st.plotly_chart(fig, use_container_width=True)
+
+col1, col2 = st.columns(2)
+
+with col1:
+    with span("figure", chart="unit_revenue_share"):
+        fig = px.pie(
+            consolidation.top_n(view, level),
+            values="Total Revenue",
+            names="Label",
+            title="Распределение выручки"
+        )
+    with span("render", chart="unit_revenue_share"):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2:
+    # The "other" bucket would dwarf every point, so only the largest groups are plotted
+    points = consolidation.top_n(view, level, n=SCATTER_POINTS).iloc[:SCATTER_POINTS]
+    with span("figure", chart="unit_margin_volume"):
+        fig = px.scatter(
+            points,
+            x="Volume",
+            y="Margin %",
+            size="Total Profit",
+            color="Label" if len(points) <= consolidation.TOP_N else None,
+            hover_name="Label",
+            title="Маржа % vs Объем"
+        )
+    with span("render", chart="unit_margin_volume"):
+        st.plotly_chart(fig, use_container_width=True)
+    if len(view) > SCATTER_POINTS:
+        st.caption(f"Показаны {SCATTER_POINTS} крупнейших по выручке из {len(view)}")
+
+# Data table
+st.subheader("Данные по юнит-экономике")
+st.dataframe(unit_data if level == "Product" else view)
+
+# AI Analysis
+st.subheader("ИИ-анализ юнит-экономики")
+analysis_section('unit_economics', unit_data, "Выполнить анализ юнит-экономики", "Анализируем данные юнит-экономики...")
@@ -0,0 +1 @@
+"""Headless benchmarks of the dashboard's data paths; see ``benchmarks/run.py``."""
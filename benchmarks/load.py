@@ -0,0 +1,412 @@
+"""Concurrent-session load test of the dashboard.
+
+For every level of concurrency a fresh ``streamlit run streamlit_app.py``
+server is started and N scripted clients connect to it over the same
+websocket protocol the browser uses. Each client logs in through the login
+page, uploads a P&L file of its own, opens the four pages and runs the
+analysis of each one, polling running jobs the way the page's fragments do.
+The harness reports p50/p95/p99 latency per action, measured from sending the
+rerun to the server's "script finished" message, and the resident memory of
+the server and its worker processes::
+
+    python -m benchmarks.load                          # 1, 5, 10 and 20 sessions
+    python -m benchmarks.load --sessions 1,50 --rows 20000
+    python -m benchmarks.load --json load.json         # also write the numbers
+
+Users and their data live in a temporary directory that is removed at the end.
+Browser rendering is not included: the numbers are what the server takes.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "streamlit_app.py"
+# Pages in the order a session visits them, by their URL path
+PAGES = ["", "profit_loss", "unit_economics", "forecasts"]
+PASSWORD = "load-test"
+PERCENTILES = (50, 95, 99)
+RERUN_ACTIONS = {"open", "login", "upload", "page", "analysis", "poll"}
+# How long a session waits for a job, and how often it polls without an auto-rerun interval
+JOB_TIMEOUT = 300
+POLL_SECONDS = 0.5
+SERVER_OPTIONS = [
+    "--server.headless", "true",
+    "--server.fileWatcherType", "none",
+    "--browser.gatherUsageStats", "false",
+    # The scripted client sends no XSRF token or browser origin
+    "--server.enableXsrfProtection", "false",
+    "--server.enableCORS", "false",
+]
+
+
+def _proto():
+    # Imported lazily so --help works without streamlit
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.Common_pb2 import FileURLs, UploadedFileInfo
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    return BackMsg, ForwardMsg, WidgetState, UploadedFileInfo, FileURLs
+
+
+def _rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _children(pid):
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children += [int(child) for child in f.read().split()]
+    return children + [grandchild for child in children for grandchild in _children(child)]
+
+
+def process_rss_mb(pid):
+    """Return ``(server, workers)`` resident memory in MB; Linux only, else ``(None, None)``."""
+    try:
+        workers = 0
+        for child in _children(pid):
+            try:
+                workers += _rss_kb(child)
+            except OSError:
+                pass
+        return _rss_kb(pid) / 1024, workers / 1024
+    except OSError:
+        return None, None
+
+
+class Server:
+    """A ``streamlit run`` of the dashboard in ``workdir`` on a free port."""
+
+    def __init__(self, workdir):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(APP), "--server.port", str(self.port), *SERVER_OPTIONS],
+            cwd=workdir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 60
+        while not self._healthy():
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError("Streamlit server did not start")
+            time.sleep(0.2)
+
+    def _healthy(self):
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=1)
+            connection.request("GET", "/_stcore/health")
+            return connection.getresponse().status == 200
+        except OSError:
+            return False
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def rss_mb(self):
+        return process_rss_mb(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def _put_file(port, url, name, data):
+    # The upload endpoint takes one file in a multipart form
+    boundary = uuid.uuid4().hex
+    body = b"".join([
+        f"--{boundary}\r\n".encode(),
+        f'Content-Disposition: form-data; name="{name}"; filename="{name}"\r\n'.encode(),
+        b"Content-Type: text/csv\r\n\r\n",
+        data,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    connection.request("PUT", urlsplit(url).path, body, {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    response = connection.getresponse()
+    response.read()
+    if response.status >= 300:
+        raise RuntimeError(f"upload failed with HTTP {response.status}")
+
+
+class Client:
+    """One simulated browser session; records the latency of every rerun it triggers."""
+
+    def __init__(self, server, name, data):
+        self.server = server
+        self.name = name
+        self.data = data
+        self.timings = defaultdict(list)
+        self.errors = []
+        self.session_id = None
+        self.pages = {}
+        self.page_hash = ""
+        # Values of the session's widgets, sent with every rerun like the browser does
+        self.widgets = {}
+        self.elements = []
+        self.auto_reruns = {}
+        self.ws = None
+
+    async def _receive(self):
+        _, ForwardMsg, *_ = _proto()
+        message = ForwardMsg()
+        message.ParseFromString(await self.ws.recv())
+        kind = message.WhichOneof("type")
+        if kind == "new_session":
+            self.session_id = message.new_session.initialize.session_id or self.session_id
+        elif kind == "navigation":
+            self.pages = {page.url_pathname: page.page_script_hash for page in message.navigation.app_pages}
+            self.page_hash = message.navigation.page_script_hash or self.page_hash
+        elif kind == "auto_rerun":
+            self.auto_reruns[message.auto_rerun.fragment_id] = message.auto_rerun.interval
+        elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+            element = message.delta.new_element
+            self.elements.append((element.WhichOneof("type"), getattr(element, element.WhichOneof("type"))))
+        return kind, message
+
+    async def rerun(self, action, triggers=(), fragment_id=None):
+        """Send a rerun and wait until the server has finished it and any rerun it requested."""
+        BackMsg, ForwardMsg, *_ = _proto()
+        message = BackMsg()
+        state = message.rerun_script
+        state.page_script_hash = self.page_hash
+        if fragment_id is not None:
+            state.fragment_id = fragment_id
+            state.is_auto_rerun = True
+        state.widget_states.widgets.extend(list(self.widgets.values()) + list(triggers))
+        self.elements = []
+        start = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+        while True:
+            kind, reply = await self._receive()
+            if kind == "script_finished" and reply.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.timings[action].append(time.perf_counter() - start)
+        self.errors += [f"{action}: {element.message}" for kind, element in self.elements if kind == "exception"]
+
+    def find(self, kind, match):
+        for element_kind, element in self.elements:
+            if element_kind == kind and match(element):
+                return element
+        raise LookupError(f"{self.name}: no {kind} on the page")
+
+    def _value(self, element, **value):
+        _, _, WidgetState, *_ = _proto()
+        self.widgets[element.id] = WidgetState(id=element.id, **value)
+
+    def _trigger(self, element):
+        _, _, WidgetState, *_ = _proto()
+        return WidgetState(id=element.id, trigger_value=True)
+
+    def _busy(self):
+        return any(kind == "progress" for kind, _ in self.elements)
+
+    async def settle(self, action, start):
+        """Poll while a job's progress is shown, as the page's auto-rerunning fragment does."""
+        while self._busy():
+            if time.perf_counter() - start > JOB_TIMEOUT:
+                self.errors.append(f"{action}: timed out")
+                break
+            if self.auto_reruns:
+                fragment_id, interval = next(iter(self.auto_reruns.items()))
+                await asyncio.sleep(interval)
+                await self.rerun("poll", fragment_id=fragment_id)
+            else:
+                await asyncio.sleep(POLL_SECONDS)
+                await self.rerun("poll")
+        self.auto_reruns.clear()
+        self.timings[f"{action} (total)"].append(time.perf_counter() - start)
+
+    async def login(self):
+        await self.rerun("open")
+        self._value(self.find("text_input", lambda e: e.id.endswith("-login_username")), string_value=self.name)
+        self._value(self.find("text_input", lambda e: e.id.endswith("-login_password")), string_value=PASSWORD)
+        button = self.find("button", lambda e: e.label == "Войти")
+        await self.rerun("login", [self._trigger(button)])
+
+    async def upload(self):
+        BackMsg, ForwardMsg, _, UploadedFileInfo, FileURLs = _proto()
+        uploader = self.find("file_uploader", lambda e: True)
+        file_name = f"{self.name}.csv"
+        request = BackMsg()
+        request.file_urls_request.request_id = uuid.uuid4().hex
+        request.file_urls_request.session_id = self.session_id
+        request.file_urls_request.file_names.append(file_name)
+        start = time.perf_counter()
+        await self.ws.send(request.SerializeToString())
+        while True:
+            kind, reply = await self._receive()
+            if kind == "file_urls_response" and reply.file_urls_response.response_id == request.file_urls_request.request_id:
+                break
+        if reply.file_urls_response.error_msg:
+            raise RuntimeError(reply.file_urls_response.error_msg)
+        urls = reply.file_urls_response.file_urls[0]
+        await asyncio.to_thread(_put_file, self.server.port, urls.upload_url, file_name, self.data)
+        self.timings["upload transfer"].append(time.perf_counter() - start)
+
+        info = UploadedFileInfo(name=file_name, size=len(self.data), file_id=urls.file_id)
+        info.file_urls.CopyFrom(FileURLs(file_id=urls.file_id, upload_url=urls.upload_url, delete_url=urls.delete_url))
+        self._value(uploader, file_uploader_state_value={"uploaded_file_info": [info]})
+        await self.rerun("upload")
+        await self.settle("upload", start)
+
+    async def visit(self, path):
+        self.page_hash = self.pages[path]
+        await self.rerun("page")
+        try:
+            button = self.find("button", lambda e: "анализ" in e.label.lower())
+        except LookupError:
+            return
+        start = time.perf_counter()
+        await self.rerun("analysis", [self._trigger(button)])
+        await self.settle("analysis", start)
+
+    async def run(self):
+        from websockets.asyncio.client import connect
+
+        try:
+            async with connect(self.server.url, subprotocols=["streamlit"], max_size=None) as ws:
+                self.ws = ws
+                await self.login()
+                await self.upload()
+                for path in PAGES:
+                    await self.visit(path)
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+        return self
+
+
+def _ledger(rows, seed):
+    import pandas as pd
+
+    from finance.sample_data import generate_financial_data
+
+    # Hourly rows ending today, so the default date filter of the pages covers them
+    np.random.seed(seed)
+    start = pd.Timestamp.today().normalize() - pd.Timedelta(hours=rows - 1)
+    df = generate_financial_data(start, periods=rows, freq="h")
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _create_users(workdir, names):
+    from app_pages.session import get_user_hash
+    from finance.users import get_user_store
+
+    data_dir = Path(workdir) / "user_data"
+    data_dir.mkdir(exist_ok=True)
+    store = get_user_store(data_dir)
+    for name in names:
+        store.create_user(name, get_user_hash(name, PASSWORD))
+
+
+def _summary(values):
+    return {"count": len(values), **{f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}}
+
+
+def run_level(workdir, level, sessions, rows):
+    """Run ``sessions`` concurrent sessions against a fresh server; return their latency summary."""
+    names = [f"load{level}_{i}" for i in range(sessions)]
+    _create_users(workdir, names)
+    ledgers = [_ledger(rows, i) for i in range(sessions)]
+    server = Server(workdir)
+    try:
+        idle_rss, _ = server.rss_mb()
+
+        async def run_all():
+            clients = [Client(server, name, data) for name, data in zip(names, ledgers)]
+            return await asyncio.gather(*(client.run() for client in clients))
+
+        started = time.perf_counter()
+        clients = asyncio.run(run_all())
+        seconds = time.perf_counter() - started
+        rss, workers_rss = server.rss_mb()
+    finally:
+        server.stop()
+
+    timings = defaultdict(list)
+    for client in clients:
+        for action, values in client.timings.items():
+            timings[action] += values
+    # Transfers and per-action totals are not reruns of their own
+    reruns = [value for action, values in timings.items() if action in RERUN_ACTIONS for value in values]
+    return {
+        "sessions": sessions,
+        "seconds": seconds,
+        "reruns": _summary(reruns) if reruns else {"count": 0},
+        "actions": {action: _summary(values) for action, values in sorted(timings.items())},
+        "errors": [error for client in clients for error in client.errors],
+        "rss_idle_mb": idle_rss,
+        "rss_mb": rss,
+        "workers_rss_mb": workers_rss,
+    }
+
+
+def _mb(value):
+    return "n/a" if value is None else f"{value:.0f} MB"
+
+
+def _print_level(result):
+    print(
+        f"\n{result['sessions']} sessions: {result['seconds']:.1f}s, {result['reruns']['count']} reruns, "
+        f"server RSS {_mb(result['rss_idle_mb'])} idle -> {_mb(result['rss_mb'])}, "
+        f"workers {_mb(result['workers_rss_mb'])}, {len(result['errors'])} errors"
+    )
+    print(f"  {'action':<20}{'count':>7}" + "".join(f"{f'p{p}, ms':>12}" for p in PERCENTILES))
+    rows = [("all reruns", result["reruns"])] + list(result["actions"].items())
+    for action, stats in rows:
+        if stats["count"]:
+            print(f"  {action:<20}{stats['count']:>7}" + "".join(f"{stats[f'p{p}'] * 1000:>12.1f}" for p in PERCENTILES))
+    for error in result["errors"][:5]:
+        print(f"  ! {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions against a local server.")
+    parser.add_argument("--sessions", default="1,5,10,20", help="comma-separated numbers of concurrent sessions")
+    parser.add_argument("--rows", type=int, default=20_000, help="hourly rows in each uploaded P&L file")
+    parser.add_argument("--json", type=Path, default=None, help="write the results to this file")
+    args = parser.parse_args(argv)
+    levels = [int(n) for n in args.sessions.split(",") if n]
+
+    workdir = tempfile.mkdtemp(prefix="finance-load-")
+    try:
+        results = []
+        for level, sessions in enumerate(levels):
+            results.append(run_level(workdir, level, sessions, args.rows))
+            _print_level(results[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
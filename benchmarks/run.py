@@ -0,0 +1,226 @@
+"""Headless benchmarks of ingestion, analysis, forecasting and chart preparation.
+
+Each stage runs on synthetic data of every requested size; the best wall time
+over a few repeats and the peak traced memory of one extra run are reported.
+Results are compared with a stored baseline and the run fails when a stage
+got slower or hungrier than the tolerance allows::
+
+    python -m benchmarks.run                        # compare with benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1k,100k        # skip the 10M rows size
+    python -m benchmarks.run --save-baseline        # record the current numbers
+
+Baselines depend on the machine, so record them on the host that runs the
+comparison; the committed one covers the 1k and 100k sizes, and sizes it has
+no numbers for are not compared. A missing baseline fails the run when
+``--baseline`` names it or the ``CI`` environment variable is set; otherwise
+there is nothing to compare.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from finance import analysis, consolidation, downsample, forecasting, ingest, rollups, templates, timeindex, timeseries
+from finance.sample_data import generate_financial_data, generate_unit_economics
+
+SIZES = {"1k": 1_000, "100k": 100_000, "10M": 10_000_000}
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Differences below this many seconds are noise, whatever the ratio
+NOISE_SECONDS = 0.005
+
+
+def financial_frame(rows):
+    return generate_financial_data("2000-01-01", periods=rows, freq="min")
+
+
+def scenario_frame(rows):
+    growth = np.random.uniform(0.001, 0.01, size=(rows, 3))
+    values = 100000 * np.cumprod(1 + growth, axis=0)
+    return pd.DataFrame(values, columns=forecasting.PERCENTILES)
+
+
+class Stage:
+    """A benchmarked call: ``prepare(rows)`` builds shared input once per size,
+    ``setup(data)`` runs untimed before every repeat and ``run(args)`` is timed."""
+
+    def __init__(self, name, run, prepare=None, setup=None, max_rows=None):
+        self.name = name
+        self.run = run
+        self.prepare = prepare or (lambda rows: rows)
+        self.setup = setup or (lambda data: data)
+        self.max_rows = max_rows
+
+
+def series_matrix(rows):
+    # Ten years of monthly values per series, one series per 100 rows
+    months = np.arange(120)
+    series = max(rows // 100, 1)
+    season = 10 * np.sin(2 * np.pi * months / timeseries.SEASON)
+    return 100 + 0.2 * months + season + np.random.normal(0, 2, size=(series, len(months)))
+
+
+def unit_catalog(rows):
+    return generate_unit_economics(rows, entities=3, categories=40)
+
+
+def _fresh(df):
+    # Memos are keyed by content, so a new frame object alone would still hit them;
+    # clear them and hand over a new object so fingerprinting starts cold as well
+    analysis.clear_memo()
+    rollups.clear_memo()
+    downsample.clear_memo()
+    timeindex.clear_memo()
+    consolidation.clear_memo()
+    return df.copy(deep=False)
+
+
+def _render_cold(result):
+    templates.render.cache_clear()
+    return templates.render(result, templates.DEFAULT_LOCALE)
+
+
+def _run_scenarios(paths):
+    forecasting._forecast.cache_clear()
+    return forecasting.generate_scenarios(paths=paths)
+
+
+STAGES = [
+    Stage("generate_financial_data", financial_frame),
+    Stage("generate_unit_economics", generate_unit_economics),
+    Stage(
+        "upload_csv",
+        lambda data: ingest.ingest(io.BytesIO(data), "bench.csv"),
+        prepare=lambda rows: financial_frame(rows).to_csv(index=False).encode("utf-8"),
+    ),
+    Stage("analyze_financial_data", analysis.analyze_financial_data, prepare=financial_frame, setup=_fresh),
+    Stage("analyze_unit_economics", analysis.analyze_unit_economics, prepare=generate_unit_economics, setup=_fresh),
+    Stage("analyze_forecasts", analysis.analyze_forecasts, prepare=scenario_frame, setup=_fresh),
+    Stage("render_report", _render_cold, prepare=lambda rows: analysis.analyze_unit_economics(unit_catalog(rows))),
+    Stage("consolidate", lambda df: consolidation.consolidate(df, "Category"), prepare=unit_catalog, setup=_fresh),
+    Stage("product_search", lambda df: consolidation.ProductIndex(df).search("product 42"), prepare=unit_catalog, setup=_fresh),
+    # 10M paths x 12 months would need ~1 GB per copy of the simulation
+    Stage("generate_scenarios", _run_scenarios, max_rows=1_000_000),
+    Stage("rollups", rollups.Rollups.build, prepare=financial_frame),
+    # 100k series x 120 months would need several GB for the intermediate arrays
+    Stage("scan_series", timeseries.anomalies, prepare=series_matrix, max_rows=1_000_000),
+    Stage(
+        "downsample",
+        lambda df: downsample.downsample(df, "Date", ["Revenue", "Costs", "Profit"]),
+        prepare=financial_frame,
+        setup=_fresh,
+    ),
+    Stage(
+        "filter_date_range",
+        lambda df: timeindex.filter_date_range(df, "2000-01-02", "2000-03-01"),
+        prepare=financial_frame,
+        setup=_fresh,
+    ),
+]
+
+
+def measure(stage, rows, repeats):
+    data = stage.prepare(rows)
+
+    best = float("inf")
+    for _ in range(repeats):
+        args = stage.setup(data)
+        start = time.perf_counter()
+        stage.run(args)
+        best = min(best, time.perf_counter() - start)
+
+    args = stage.setup(data)
+    tracemalloc.start()
+    stage.run(args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak_mb": peak / 2**20}
+
+
+def run(sizes, repeats, stages=None):
+    results = {}
+    for stage in STAGES:
+        if stages and stage.name not in stages:
+            continue
+        results[stage.name] = {}
+        for label in sizes:
+            rows = SIZES[label]
+            if stage.max_rows is not None and rows > stage.max_rows:
+                continue
+            results[stage.name][label] = measure(stage, rows, repeats)
+            result = results[stage.name][label]
+            print(f"{stage.name:<26} {label:>5} {result['seconds'] * 1000:>12.2f} ms {result['peak_mb']:>10.1f} MB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against ``baseline``."""
+    regressions = []
+    for stage, by_size in results.items():
+        for label, result in by_size.items():
+            base = baseline.get(stage, {}).get(label)
+            if base is None:
+                continue
+            if result["seconds"] > base["seconds"] * (1 + tolerance) and result["seconds"] - base["seconds"] > NOISE_SECONDS:
+                regressions.append(f"{stage} [{label}]: {base['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms")
+            if result["peak_mb"] > base["peak_mb"] * (1 + tolerance) and result["peak_mb"] - base["peak_mb"] > 1:
+                regressions.append(f"{stage} [{label}]: {base['peak_mb']:.1f} MB -> {result['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma-separated subset of " + ", ".join(SIZES))
+    parser.add_argument("--stages", default="", help="comma-separated stage names (default: all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--baseline", type=Path, help=f"default: {BASELINE_PATH}")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    sizes = [label for label in args.sizes.split(",") if label]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+    stages = {name for name in args.stages.split(",") if name}
+
+    # An explicit baseline is required to exist; the default one only in CI
+    required = args.baseline is not None or bool(os.environ.get("CI"))
+    baseline_path = args.baseline or BASELINE_PATH
+
+    results = run(sizes, args.repeats, stages)
+
+    if args.save_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {"results": {}}
+        for stage, by_size in results.items():
+            baseline["results"].setdefault(stage, {}).update(by_size)
+        baseline["environment"] = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        }
+        baseline_path.write_text(json.dumps(baseline, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        return 1 if required else 0
+    regressions = compare(results, json.loads(baseline_path.read_text())["results"], args.tolerance)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+"""Analysis engine behind the "ИИ-анализ" sections of the dashboard.
+
+Each ``*_metrics`` function computes every number a report needs in one pass
+over the NumPy arrays of the input columns; the caller's frame is never copied
+or modified. Month-level findings of P&L frames (best and loss-making months,
+seasonality, anomalies) come from monthly totals analysed by
+:mod:`finance.timeseries`, so rows may be of any frequency. ``analyze_*`` turn
+those metrics into the findings and recommendation codes of a
+:mod:`finance.results` record, rendered as text by :mod:`finance.templates`,
+and are memoized by dataset fingerprint, so the Dashboard and P&L pages share
+one result for the same data.
+"""
+import numpy as np
+import pandas as pd
+
+from finance import consolidation, timeseries
+from finance.cache import FrameMemo
+from finance.results import Anomaly, FinancialAnalysis, ForecastAnalysis, GroupFindings, UnitEconomicsAnalysis
+
+SCENARIOS = ["Conservative", "Base Case", "Optimistic"]
+SERIES = ["Revenue", "Costs", "Profit"]
+SUMMER_MONTHS = [6, 7, 8]
+WINTER_MONTHS = [12, 1, 2]
+# Longest product list quoted in a recommendation; the largest products by revenue are named
+PRODUCT_LIST_LIMIT = 10
+# Anomalies quoted in a recommendation, the largest first
+ANOMALY_LIST_LIMIT = 5
+# Thresholds of the recommendations
+LOW_MARGIN_PCT = 15
+LOW_PRODUCT_MARGIN_PCT = 20
+SEASON_RATIO = 1.1
+# Share of revenue variation the season must explain to be reported, and to plan around
+SEASON_STRENGTH = 0.3
+STRONG_SEASON_STRENGTH = 0.6
+SLOW_GROWTH_PCT = 10
+FAST_GROWTH_PCT = 50
+WIDE_SPREAD_PCT = 40
+
+_memo = FrameMemo()
+
+
+def clear_memo():
+    _memo.clear()
+
+
+def _column(df, name):
+    return df[name].to_numpy(dtype=float, copy=False)
+
+
+def _dates(df):
+    dates = df["Date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    return pd.DatetimeIndex(dates)
+
+
+def _growth(values, last):
+    return (values[last] / values[0] - 1) * 100
+
+
+def financial_metrics(df):
+    """Compute growth, margin, seasonality, loss-month and anomaly metrics of a P&L frame.
+
+    An incomplete last month takes part in the totals but not in comparisons
+    between months.
+    """
+    revenue = _column(df, "Revenue")
+    costs = _column(df, "Costs")
+    profit = _column(df, "Profit")
+    dates = _dates(df)
+    months, positions = timeseries.month_grid(dates)
+    complete = timeseries.complete_months(dates)
+    last = int(np.flatnonzero(complete)[-1])
+
+    # Revenue, costs and profit per calendar month, decomposed in one batch
+    monthly = timeseries.monthly_sums(positions, len(months), [revenue, costs, profit])
+    if not complete.all():
+        monthly[:, -1] = np.nan
+    monthly_revenue, monthly_profit = monthly[0], monthly[2]
+    decomposition = timeseries.decompose(monthly)
+    flagged, scores = timeseries.anomalies(monthly, decomposition)
+
+    best = int(np.nanargmax(monthly_profit))
+    metrics = {
+        "revenue_up": revenue[last] > revenue[0],
+        "costs_up": costs[last] > costs[0],
+        "profit_up": profit[last] > profit[0],
+        "revenue_growth": _growth(revenue, last),
+        "costs_growth": _growth(costs, last),
+        "profit_growth": _growth(profit, last),
+        "avg_margin": float(np.mean(profit / revenue) * 100),
+        "best_month": months[best],
+        "best_month_revenue": monthly_revenue[best],
+        "best_month_profit": monthly_profit[best],
+        "loss_months": list(months[monthly_profit < 0]),
+        "summer_avg": None,
+        "winter_avg": None,
+        "seasonal_strength": None,
+        "peak_month": None,
+        "trough_month": None,
+        "summer_season": None,
+        "winter_season": None,
+    }
+
+    calendar = months.month.to_numpy()
+    observed = ~np.isnan(monthly_revenue)
+    if observed.sum() >= 6:
+        summer = np.isin(calendar, SUMMER_MONTHS) & observed
+        winter = np.isin(calendar, WINTER_MONTHS) & observed
+        if summer.any() and winter.any():
+            metrics["summer_avg"] = float(monthly_revenue[summer].mean())
+            metrics["winter_avg"] = float(monthly_revenue[winter].mean())
+
+    strength = decomposition.strength[0]
+    if np.isfinite(strength):
+        # One year of the revenue season, labelled with its calendar months
+        season = decomposition.seasonal[0, :timeseries.SEASON]
+        season_months = calendar[:timeseries.SEASON]
+        metrics["seasonal_strength"] = float(strength)
+        metrics["peak_month"] = int(season_months[np.argmax(season)])
+        metrics["trough_month"] = int(season_months[np.argmin(season)])
+        metrics["summer_season"] = float(season[np.isin(season_months, SUMMER_MONTHS)].mean())
+        metrics["winter_season"] = float(season[np.isin(season_months, WINTER_MONTHS)].mean())
+
+    rows, columns = np.nonzero(flagged)
+    order = np.argsort(-np.abs(scores[rows, columns]), kind="stable")
+    expected = decomposition.expected
+    metrics["anomaly_count"] = len(order)
+    metrics["anomalies"] = [
+        {
+            "series": SERIES[row],
+            "month": months[column],
+            "value": monthly[row, column],
+            "expected": expected[row, column],
+        }
+        for row, column in zip(rows[order[:ANOMALY_LIST_LIMIT]], columns[order[:ANOMALY_LIST_LIMIT]])
+    ]
+
+    return metrics
+
+
+def _largest(products, mask, revenue):
+    """Return the names of the ``PRODUCT_LIST_LIMIT`` largest products in ``mask`` and their count."""
+    selected = np.flatnonzero(mask)
+    if len(selected) > PRODUCT_LIST_LIMIT:
+        top = np.argpartition(-revenue[selected], PRODUCT_LIST_LIMIT)[:PRODUCT_LIST_LIMIT]
+        selected = selected[top[np.argsort(-revenue[selected][top], kind="stable")]]
+    return products[selected].tolist(), int(mask.sum())
+
+
+def unit_economics_metrics(df):
+    """Compute best/worst products, recommendation sets and top groups of a unit economics frame."""
+    products = consolidation.labels(df, "Product")
+    price = _column(df, "Price")
+    margin_pct = _column(df, "Margin %")
+    volume = _column(df, "Volume")
+    total_profit = _column(df, "Total Profit")
+    revenue = _column(df, "Total Revenue") if "Total Revenue" in df.columns else price * volume
+
+    avg_margin_pct = float(margin_pct.mean())
+    best_margin, worst_margin = int(np.argmax(margin_pct)), int(np.argmin(margin_pct))
+    best_profit, worst_profit = int(np.argmax(total_profit)), int(np.argmin(total_profit))
+
+    low_margin, low_margin_count = _largest(products, margin_pct < LOW_PRODUCT_MARGIN_PCT, revenue)
+    low_volume, low_volume_count = _largest(products, (margin_pct > avg_margin_pct) & (volume < volume.mean()), revenue)
+
+    # The most and least profitable group on each consolidation level above products
+    groups = {}
+    for level in consolidation.levels(df)[:-1]:
+        view = consolidation.consolidate(df, level)
+        names = consolidation.labels(view, level)
+        profit = view["Total Profit"].to_numpy(dtype=float)
+        best, worst = int(np.argmax(profit)), int(np.argmin(profit))
+        groups[level] = {
+            "count": len(view),
+            "best": names[best],
+            "best_profit": profit[best],
+            "best_margin_pct": view["Margin %"].iloc[best],
+            "worst": names[worst],
+            "worst_profit": profit[worst],
+        }
+
+    return {
+        "avg_price": float(price.mean()),
+        "avg_margin_pct": avg_margin_pct,
+        "best_margin_product": products[best_margin],
+        "best_margin_pct": margin_pct[best_margin],
+        "worst_margin_product": products[worst_margin],
+        "worst_margin_pct": margin_pct[worst_margin],
+        "best_profit_product": products[best_profit],
+        "best_profit": total_profit[best_profit],
+        "worst_profit_product": products[worst_profit],
+        "worst_profit": total_profit[worst_profit],
+        "low_margin_products": low_margin,
+        "low_margin_count": low_margin_count,
+        "low_volume_high_margin": low_volume,
+        "low_volume_high_margin_count": low_volume_count,
+        "groups": groups,
+    }
+
+
+def forecast_metrics(df):
+    """Compute total and average monthly growth and the spread of forecast scenarios."""
+    scenarios = [scenario for scenario in SCENARIOS if scenario in df.columns]
+    values = df[scenarios].to_numpy(dtype=float)
+
+    total_growth = (values[-1] / values[0] - 1) * 100
+    monthly_growth = (values[1:] / values[:-1] - 1).mean(axis=0) * 100
+
+    return {
+        "scenarios": scenarios,
+        "first": dict(zip(scenarios, values[0])),
+        "last": dict(zip(scenarios, values[-1])),
+        "growth": dict(zip(scenarios, total_growth)),
+        "monthly_growth": dict(zip(scenarios, monthly_growth)),
+    }
+
+
+def _financial_analysis(df):
+    m = financial_metrics(df)
+
+    summer_avg, winter_avg = m["summer_avg"], m["winter_avg"]
+    seasonal_strength = m["seasonal_strength"]
+    season = None
+    if seasonal_strength is not None and summer_avg is not None:
+        # Judged on the seasonal component, so a trend cannot pass for a season
+        if seasonal_strength < SEASON_STRENGTH:
+            season = "none"
+        elif m["summer_season"] > m["winter_season"]:
+            season = "summer"
+        else:
+            season = "winter"
+    elif summer_avg is not None:
+        if summer_avg > winter_avg * SEASON_RATIO:
+            season = "summer"
+        elif winter_avg > summer_avg * SEASON_RATIO:
+            season = "winter"
+        else:
+            season = "none"
+
+    recommendations = []
+    if m["costs_growth"] > m["revenue_growth"]:
+        recommendations.append("costs_outpace_revenue")
+    if m["avg_margin"] < LOW_MARGIN_PCT:
+        recommendations.append("low_margin")
+    if m["loss_months"]:
+        recommendations.append("loss_months")
+    if m["anomalies"]:
+        recommendations.append("anomalies")
+    if seasonal_strength is not None and seasonal_strength >= STRONG_SEASON_STRENGTH:
+        recommendations.append("seasonal_plan")
+
+    return FinancialAnalysis(
+        revenue_up=bool(m["revenue_up"]),
+        costs_up=bool(m["costs_up"]),
+        profit_up=bool(m["profit_up"]),
+        revenue_growth=float(m["revenue_growth"]),
+        costs_growth=float(m["costs_growth"]),
+        profit_growth=float(m["profit_growth"]),
+        avg_margin=m["avg_margin"],
+        best_month=m["best_month"].date(),
+        best_month_revenue=float(m["best_month_revenue"]),
+        best_month_profit=float(m["best_month_profit"]),
+        loss_months=tuple(d.date() for d in m["loss_months"]),
+        summer_avg=summer_avg,
+        winter_avg=winter_avg,
+        season=season,
+        seasonal_strength=seasonal_strength,
+        peak_month=m["peak_month"],
+        trough_month=m["trough_month"],
+        anomalies=tuple(
+            Anomaly(
+                series=a["series"],
+                month=a["month"].date(),
+                value=float(a["value"]),
+                expected=float(a["expected"]),
+            )
+            for a in m["anomalies"]
+        ),
+        anomaly_count=m["anomaly_count"],
+        recommendations=tuple(recommendations),
+    )
+
+
+def _unit_economics_analysis(df):
+    m = unit_economics_metrics(df)
+
+    recommendations = []
+    if m["low_margin_products"]:
+        recommendations.append("low_margin_products")
+    if m["low_volume_high_margin"]:
+        recommendations.append("low_volume_high_margin")
+
+    return UnitEconomicsAnalysis(
+        avg_price=m["avg_price"],
+        avg_margin_pct=m["avg_margin_pct"],
+        best_margin_product=str(m["best_margin_product"]),
+        best_margin_pct=float(m["best_margin_pct"]),
+        worst_margin_product=str(m["worst_margin_product"]),
+        worst_margin_pct=float(m["worst_margin_pct"]),
+        best_profit_product=str(m["best_profit_product"]),
+        best_profit=float(m["best_profit"]),
+        worst_profit_product=str(m["worst_profit_product"]),
+        worst_profit=float(m["worst_profit"]),
+        low_margin_products=tuple(map(str, m["low_margin_products"])),
+        low_margin_count=m["low_margin_count"],
+        low_volume_high_margin=tuple(map(str, m["low_volume_high_margin"])),
+        low_volume_high_margin_count=m["low_volume_high_margin_count"],
+        groups=tuple(
+            GroupFindings(
+                level=level,
+                count=group["count"],
+                best=str(group["best"]),
+                best_profit=float(group["best_profit"]),
+                best_margin_pct=float(group["best_margin_pct"]),
+                worst=str(group["worst"]),
+                worst_profit=float(group["worst_profit"]),
+            )
+            for level, group in m["groups"].items()
+        ),
+        recommendations=tuple(recommendations),
+    )
+
+
+def _forecast_analysis(df):
+    m = forecast_metrics(df)
+    last = m["last"]
+
+    spread = (last.get("Optimistic", 0) / last.get("Conservative", 1) - 1) * 100
+    risk_gap = (last.get("Optimistic", 0) - last.get("Conservative", 0)) / last.get("Base Case", 1) * 100
+
+    recommendations = []
+    base_case_growth = m["growth"].get("Base Case", 0)
+    if base_case_growth < SLOW_GROWTH_PCT:
+        recommendations.append("slow_growth")
+    elif base_case_growth > FAST_GROWTH_PCT:
+        recommendations.append("fast_growth")
+    if risk_gap > WIDE_SPREAD_PCT:
+        recommendations.append("wide_spread")
+
+    scenarios = m["scenarios"]
+    return ForecastAnalysis(
+        periods=len(df),
+        scenarios=tuple(scenarios),
+        growth=tuple(float(m["growth"][s]) for s in scenarios),
+        monthly_growth=tuple(float(m["monthly_growth"][s]) for s in scenarios),
+        spread=float(spread),
+        risk_gap=float(risk_gap),
+        recommendations=tuple(recommendations),
+    )
+
+
+def analyze_financial_data(df):
+    """Perform AI analysis on financial data."""
+    return _memo.get_or_compute("financial", df, _financial_analysis)
+
+
+def analyze_unit_economics(df):
+    """Perform AI analysis on unit economics data."""
+    return _memo.get_or_compute("unit_economics", df, _unit_economics_analysis)
+
+
+def analyze_forecasts(df):
+    """Perform AI analysis on forecast scenarios data."""
+    return _memo.get_or_compute("forecasts", df, _forecast_analysis)
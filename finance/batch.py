@@ -0,0 +1,233 @@
+"""Headless batch reports for every user, e.g. from a nightly cron job::
+
+    python -m finance.batch                              # user_data/ -> reports/<date>/
+    python -m finance.batch --formats md --workers 4
+    python -m finance.batch --users alice,bob --out /srv/reports
+
+For each user the newest stored P&L and unit economics datasets are analysed
+with the same ``analyze_*`` functions as the dashboard, a revenue forecast is
+built from the last complete P&L month, and the sections are written as one
+Markdown and/or HTML report per user. Users are processed in parallel, one
+process per core; each worker memory-maps the datasets itself, so only paths
+and small summaries cross process boundaries. Throughput is printed at the end of a run.
+"""
+import argparse
+import html
+import json
+import multiprocessing
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+from finance import analysis, forecasting, storage, templates, timeseries
+from finance.ingest import FINANCIAL, UNIT_ECONOMICS
+from finance.workers import MAX_WORKERS
+
+FORMATS = ("md", "html")
+DATA_DIR = Path("user_data")
+OUT_DIR = Path("reports")
+
+SECTION_TITLES = {
+    FINANCIAL: "Финансовые показатели",
+    UNIT_ECONOMICS: "Юнит-экономика",
+    "forecasts": "Прогнозы",
+}
+
+_HTML_PAGE = """<!DOCTYPE html>
+<html lang="ru">
+<head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def latest_datasets(user_dir):
+    """Return the newest catalog entry of each analysable schema of a user."""
+    latest = {}
+    for entry in storage.list_datasets(user_dir):
+        if entry.get("schema") in (FINANCIAL, UNIT_ECONOMICS):
+            latest.setdefault(entry["schema"], entry)
+    return latest
+
+
+def _markdown(text):
+    # Templates are dedented when compiled; this only trims stray whitespace so
+    # every line of a section starts at column 0, as Markdown needs
+    return "\n".join(line.strip() for line in text.strip().splitlines())
+
+
+def _inline_html(text):
+    return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(text))
+
+
+def markdown_to_html(text):
+    """Render the Markdown subset used by the analysis sections: headings, bullets, bold."""
+    parts, paragraph, items = [], [], []
+
+    def flush():
+        if paragraph:
+            parts.append(f"<p>{_inline_html(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if items:
+            parts.append("<ul>\n" + "\n".join(f"<li>{_inline_html(item)}</li>" for item in items) + "\n</ul>")
+            items.clear()
+
+    for line in text.splitlines():
+        heading = re.match(r"(#{1,6}) (.*)", line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            parts.append(f"<h{level}>{_inline_html(heading.group(2))}</h{level}>")
+        elif line.startswith("- "):
+            if paragraph:
+                flush()
+            items.append(line[2:])
+        elif line:
+            if items:
+                flush()
+            paragraph.append(line)
+        else:
+            flush()
+    flush()
+    return "\n".join(parts)
+
+
+def build_report(user_dir, locale=templates.DEFAULT_LOCALE):
+    """Return ``(markdown, stats)`` for one user, or ``(None, stats)`` without datasets.
+
+    Analysis texts are rendered in ``locale``; headings stay in Russian.
+    """
+    user_dir = Path(user_dir)
+    latest = latest_datasets(user_dir)
+    stats = {"user": user_dir.name, "datasets": len(latest), "rows": 0}
+    if not latest:
+        return None, stats
+
+    sections = {}
+    if FINANCIAL in latest:
+        df = storage.load_dataset(user_dir, latest[FINANCIAL]["id"], entry=latest[FINANCIAL])
+        stats["rows"] += len(df)
+        sections[FINANCIAL] = (latest[FINANCIAL], analysis.analyze_financial_data(df))
+        # Forecast from the last complete month
+        revenue = df["Revenue"][timeseries.complete_months(df["Date"])]
+        scenarios = forecasting.generate_scenarios(base_revenue=float(revenue.iloc[-1]))
+        sections["forecasts"] = (None, analysis.analyze_forecasts(scenarios))
+    if UNIT_ECONOMICS in latest:
+        df = storage.load_dataset(user_dir, latest[UNIT_ECONOMICS]["id"], entry=latest[UNIT_ECONOMICS])
+        stats["rows"] += len(df)
+        sections[UNIT_ECONOMICS] = (latest[UNIT_ECONOMICS], analysis.analyze_unit_economics(df))
+
+    lines = [f"# Финансовый отчет: {user_dir.name}", "", f"Дата: {date.today().isoformat()}", ""]
+    for key, (entry, result) in sections.items():
+        lines += [f"# {SECTION_TITLES[key]}", ""]
+        if entry is not None:
+            lines += [f"Данные: {entry['name']} (версия {entry.get('version', 1)}, {entry['rows']} строк)", ""]
+        lines += [_markdown(text) + "\n" for text in templates.render(result, locale).values()]
+    return "\n".join(lines), stats
+
+
+def write_report(user_dir, out_dir, formats=FORMATS, locale=templates.DEFAULT_LOCALE):
+    """Build and write the report of one user; return its stats with timing."""
+    start = time.perf_counter()
+    report, stats = build_report(user_dir, locale)
+    stats["files"] = []
+    if report is not None:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        name = Path(user_dir).name
+        if "md" in formats:
+            path = out_dir / f"{name}.md"
+            path.write_text(report, encoding="utf-8")
+            stats["files"].append(str(path))
+        if "html" in formats:
+            path = out_dir / f"{name}.html"
+            page = _HTML_PAGE.format(title=html.escape(f"Финансовый отчет: {name}"), body=markdown_to_html(report))
+            path.write_text(page, encoding="utf-8")
+            stats["files"].append(str(path))
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def user_dirs(data_dir, users=None):
+    """Return the data directories of ``users``, or of every user.
+
+    Users with only legacy CSV snapshots count too; listing their datasets migrates them.
+    """
+    data_dir = Path(data_dir)
+    if users:
+        return [data_dir / user for user in users]
+    if not data_dir.is_dir():
+        return []
+    return sorted(path for path in data_dir.iterdir() if path.is_dir() and not path.name.startswith("."))
+
+
+def run(dirs, out_dir, formats=FORMATS, workers=MAX_WORKERS, locale=templates.DEFAULT_LOCALE):
+    """Write the reports of all ``dirs`` using ``workers`` processes; return per-user stats."""
+    results, failures = [], {}
+    workers = min(workers, len(dirs))
+    if workers <= 1:
+        for user_dir in dirs:
+            try:
+                results.append(write_report(user_dir, out_dir, formats, locale))
+            except Exception as e:
+                failures[user_dir.name] = e
+        return results, failures
+
+    # Spawned like the dashboard's pool, so workers start from a clean interpreter
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = {pool.submit(write_report, user_dir, out_dir, formats, locale): user_dir for user_dir in dirs}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                failures[futures[future].name] = e
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write analysis reports for every user.")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--out", type=Path, default=None, help=f"output directory (default: {OUT_DIR}/<date>)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma-separated subset of " + ", ".join(FORMATS))
+    parser.add_argument("--users", default="", help="comma-separated user names (default: all)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--locale", choices=list(templates.LOCALE_NAMES), default=templates.DEFAULT_LOCALE,
+                        help="language of the analysis texts")
+    args = parser.parse_args(argv)
+
+    formats = [fmt for fmt in args.formats.split(",") if fmt]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+    out_dir = args.out or OUT_DIR / date.today().isoformat()
+    dirs = user_dirs(args.data_dir, [user for user in args.users.split(",") if user])
+
+    start = time.perf_counter()
+    results, failures = run(dirs, out_dir, formats, args.workers, args.locale)
+    seconds = time.perf_counter() - start
+
+    reports = [stats for stats in results if stats["files"]]
+    rows = sum(stats["rows"] for stats in results)
+    for name, error in sorted(failures.items()):
+        print(f"FAILED {name}: {error}", file=sys.stderr)
+    print(json.dumps({
+        "users": len(dirs),
+        "reports": len(reports),
+        "failed": len(failures),
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "reports_per_second": round(len(reports) / seconds, 2) if seconds else None,
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "out": str(out_dir),
+    }, ensure_ascii=False))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
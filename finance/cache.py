@@ -0,0 +1,276 @@
+"""Process-wide, content-addressed cache for parsed datasets.
+
+Streamlit re-executes the script on every interaction, so the same upload or
+saved dataset is requested over and over, by many sessions at once. Frames are
+cached by a content hash and evicted least-recently-used once either the entry
+or the memory budget is exceeded. Cached frames are shared between sessions and
+must be treated as read-only.
+
+A session working with a dataset holds a :class:`DatasetHandle` rather than
+the frame. Handles pin their entry, so eviction only ever drops frames no
+session uses and the same dataset is never loaded twice while in use. Each
+handle exposes a shallow copy of the shared frame: with pandas' copy-on-write
+it costs no data, and anything a session does to it never reaches the shared
+frame or the other sessions.
+"""
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def content_hash(data):
+    """Return the hex SHA-256 of raw bytes, e.g. an uploaded file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def stream_hash(fileobj, block_size=1 << 20):
+    """Return the hex SHA-256 of a seekable file object without loading it whole."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df):
+    """Return a stable fingerprint of a DataFrame's columns and values."""
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+_fingerprints = {}
+# Views of shared frames by id, pointing at the frame whose fingerprint they share
+_views = {}
+
+
+def dataset_fingerprint(df):
+    """Return ``frame_fingerprint(df)``, computed once per frame object.
+
+    Datasets are shared read-only between reruns, so the fingerprint of a given
+    frame object never changes and is forgotten when the frame is collected.
+    Views handed out by :class:`DatasetHandle` share their frame's fingerprint.
+    """
+    key = id(df)
+    fingerprint = _fingerprints.get(key)
+    if fingerprint is None:
+        source = _views.get(key)
+        source = source() if source is not None else None
+        fingerprint = dataset_fingerprint(source) if source is not None else frame_fingerprint(df)
+        _fingerprints[key] = fingerprint
+        weakref.finalize(df, _fingerprints.pop, key, None)
+    return fingerprint
+
+
+def register_fingerprint(df, fingerprint):
+    """Use ``fingerprint`` for ``df`` instead of hashing its values.
+
+    For frames whose identity is already known, such as a stored dataset version.
+    """
+    key = id(df)
+    if key not in _fingerprints:
+        weakref.finalize(df, _fingerprints.pop, key, None)
+    _fingerprints[key] = fingerprint
+    return df
+
+
+def share_fingerprint(view, df):
+    """Make ``view``, a copy of ``df`` with the same content, use ``df``'s fingerprint."""
+    key = id(view)
+    _views[key] = weakref.ref(df)
+    weakref.finalize(view, _views.pop, key, None)
+    return view
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetHandle:
+    """A session's reference to a shared dataset.
+
+    The entry stays pinned in the cache until :meth:`release` is called or the
+    handle is garbage collected, e.g. with the session that held it.
+    """
+
+    __slots__ = ("key", "frame", "_release", "__weakref__")
+
+    def __init__(self, cache, key, df):
+        self.key = key
+        # A copy-on-write view: no data is copied, and changes stay in this view
+        self.frame = share_fingerprint(df.copy(deep=False), df)
+        self._release = weakref.finalize(self, cache._unpin, key)
+
+    def release(self):
+        self._release()
+
+    @property
+    def released(self):
+        return not self._release.alive
+
+
+class DatasetCache:
+    """Thread-safe LRU cache bounded by entry count and total frame size.
+
+    Entries pinned by live handles are never evicted; they still count towards
+    the budget, so unpinned entries make way for them.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._pins = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, df):
+        size = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            # A frame larger than the whole budget is not worth caching unless in use
+            if size > self.max_bytes and not self._pins.get(key):
+                return df
+            self._entries[key] = (df, size)
+            self._nbytes += size
+            self._evict()
+        return df
+
+    def get_or_load(self, key, loader):
+        """Return the cached frame for ``key`` or build it with ``loader()``."""
+        df = self.get(key)
+        if df is None:
+            df = self.put(key, loader())
+        return df
+
+    def acquire(self, key, df=None):
+        """Return a :class:`DatasetHandle` pinning the dataset cached under ``key``.
+
+        The cached frame is shared if present; otherwise ``df`` is cached first.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None and df is None:
+                raise KeyError(key)
+            self._pins[key] = self._pins.get(key, 0) + 1
+            if item is not None:
+                self._entries.move_to_end(key)
+                df = item[0]
+        if item is None:
+            self.put(key, df)
+        return DatasetHandle(self, key, df)
+
+    def _unpin(self, key):
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+                self._evict()
+
+    def pinned(self, key):
+        """Return the number of live handles of ``key``."""
+        return self._pins.get(key, 0)
+
+    def discard(self, key):
+        with self._lock:
+            item = self._entries.pop(key, None)
+            if item is not None:
+                self._nbytes -= item[1]
+
+    def clear(self):
+        """Drop every entry no handle pins."""
+        with self._lock:
+            for key in [key for key in self._entries if key not in self._pins]:
+                self._nbytes -= self._entries.pop(key)[1]
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    @property
+    def pinned_nbytes(self):
+        with self._lock:
+            return sum(size for key, (_, size) in self._entries.items() if key in self._pins)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _evict(self):
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries and self._nbytes <= self.max_bytes:
+                break
+            if key not in self._pins:
+                self._nbytes -= self._entries.pop(key)[1]
+
+
+class FrameMemo:
+    """LRU memo of values derived from read-only frames, keyed by fingerprint."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, kind, df, compute):
+        """Return ``compute(df)``, reusing the result for frames with equal content."""
+        key = (kind, dataset_fingerprint(df))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        result = compute(df)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def get(self, kind, df):
+        """Return the memoized value for ``df`` or None."""
+        key = (kind, dataset_fingerprint(df))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, kind, df, value):
+        with self._lock:
+            self._entries[(kind, dataset_fingerprint(df))] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every session served by this process
+dataset_cache = DatasetCache(
+    max_entries=int(os.environ.get("FINANCE_CACHE_MAX_ENTRIES", 32)),
+    max_bytes=int(os.environ.get("FINANCE_CACHE_MAX_MB", 512)) * 1024 * 1024,
+)
@@ -0,0 +1,141 @@
+"""Consolidation of unit economics across legal entities and categories.
+
+Catalogs run to tens of thousands of products, so nothing here loops over
+products: groups are built with one ``groupby`` over the hierarchy columns
+(see ``ingest.HIERARCHY_COLUMNS``) and their unit values are volume-weighted
+from summed totals, so consolidating products gives the same result as
+consolidating already consolidated groups. Charts show the top groups and fold
+the rest into one "Другие" row. Products are looked up through a
+:class:`ProductIndex` instead of comparing the whole ``Product`` column.
+
+Results are memoized per dataset like the other derived views.
+"""
+import numpy as np
+import pandas as pd
+
+from finance.cache import FrameMemo
+from finance.ingest import HIERARCHY_COLUMNS, UNIT_SUM_COLUMNS, unit_values
+
+OTHER = "Другие"
+TOP_N = 10
+SEARCH_LIMIT = 50
+
+_memo = FrameMemo()
+
+
+def clear_memo():
+    _memo.clear()
+
+
+def levels(df):
+    """Return the consolidation levels of a unit economics frame, outermost first."""
+    return [column for column in HIERARCHY_COLUMNS if column in df.columns] + ["Product"]
+
+
+def _with_sums(df):
+    # Uploaded or sample frames always carry the totals; derive them if a frame does not
+    if set(UNIT_SUM_COLUMNS) <= set(df.columns):
+        return df[UNIT_SUM_COLUMNS]
+    volume = df["Volume"].to_numpy(dtype=float)
+    return pd.DataFrame({
+        "Volume": volume,
+        "Total Revenue": df["Price"].to_numpy(dtype=float) * volume,
+        "Total Cost": df["Cost"].to_numpy(dtype=float) * volume,
+    })
+
+
+def _consolidate(df, level):
+    keys = levels(df)
+    keys = keys[:keys.index(level) + 1]
+    sums = _with_sums(df)
+    # Grouping on the columns' own arrays keeps categorical codes and Arrow strings native
+    grouped = sums.groupby([df[key].array for key in keys], sort=True)
+    totals = grouped.sum()
+    result = pd.DataFrame({
+        key: totals.index.get_level_values(i).to_numpy() for i, key in enumerate(keys)
+    })
+    if level != "Product":
+        result["Products"] = grouped.size().to_numpy()
+    return pd.concat([result, unit_values(totals)], axis=1)
+
+
+def consolidate(df, level="Product"):
+    """Aggregate a unit economics frame to ``level`` and every level above it."""
+    return _memo.get_or_compute(f"consolidate:{level}", df, lambda df: _consolidate(df, level))
+
+
+def labels(view, level):
+    """Return a unique display label for every row of a consolidated ``view``."""
+    names = view[level].astype(str)
+    # The same name under several entities or categories needs its path to be unique
+    if names.duplicated().any():
+        outer = levels(view)
+        for column in reversed(outer[:outer.index(level)]):
+            names = names + " · " + view[column].astype(str)
+    return names.to_numpy()
+
+
+def top_n(view, level, by="Total Revenue", n=TOP_N):
+    """Return the ``n`` largest rows of ``view`` by ``by`` plus one ``OTHER`` row for the rest.
+
+    The result has a ``Label`` column naming each row for charts.
+    """
+    view = view.assign(Label=labels(view, level))
+    if len(view) <= n:
+        return view
+    order = np.argsort(-view[by].to_numpy(dtype=float), kind="stable")
+    top, rest = view.iloc[order[:n]], view.iloc[order[n:]]
+    other = unit_values(rest[UNIT_SUM_COLUMNS].sum().to_frame().T)
+    other["Label"] = OTHER
+    if "Products" in view.columns:
+        other["Products"] = rest["Products"].sum()
+    return pd.concat([top, other], ignore_index=True).reindex(columns=view.columns)
+
+
+class ProductIndex:
+    """Product lookup by name with prefix and substring search."""
+
+    def __init__(self, df):
+        names = pd.Series(labels(df, "Product"))
+        # Unaggregated data repeats a product with its whole path; number the repeats
+        # so every row has a label of its own
+        repeat = names.groupby(names).cumcount()
+        if repeat.any():
+            names = names.where(repeat == 0, names + " (" + (repeat + 1).astype(str) + ")")
+        self.labels = names.to_numpy()
+        self._positions = pd.Index(self.labels)
+        folded = names.str.casefold()
+        self._order = np.argsort(folded.to_numpy(dtype=str), kind="stable")
+        self._sorted = folded.to_numpy(dtype=str)[self._order]
+        self._folded = folded
+
+    def __len__(self):
+        return len(self.labels)
+
+    def position(self, label):
+        """Return the row position of a product label."""
+        position = self._positions.get_loc(label)
+        if isinstance(position, int):
+            return position
+        # Only a product literally named like a numbered repeat shares its label; take the first
+        return int(np.flatnonzero(self._positions == label)[0])
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Return up to ``limit`` labels starting with ``query``, then labels containing it."""
+        query = query.strip().casefold()
+        if not query:
+            return self.labels[self._order[:limit]].tolist()
+        # Every label with the prefix sorts between the query and its successor string
+        start = np.searchsorted(self._sorted, query, side="left")
+        end = np.searchsorted(self._sorted, query[:-1] + chr(ord(query[-1]) + 1), side="left")
+        matches = self._order[start:min(end, start + limit)]
+        if len(matches) < limit:
+            contains = np.flatnonzero(self._folded.str.contains(query, regex=False).to_numpy())
+            contains = contains[~np.isin(contains, matches)]
+            matches = np.concatenate([matches, contains[:limit - len(matches)]])
+        return self.labels[matches].tolist()
+
+
+def product_index(df):
+    """Return the memoized :class:`ProductIndex` of a unit economics frame."""
+    return _memo.get_or_compute("product_index", df, ProductIndex)
@@ -0,0 +1,67 @@
+"""Versioned access to stored datasets through the shared dataset cache.
+
+A stored dataset version never changes, so it is cached under
+``"<id>:v<version>"`` and that key doubles as its fingerprint for memoized
+analyses; loading a version never hashes its values. Appending to a dataset
+whose previous version is cached builds the new version from the cached frame
+plus the delta, and when the delta only adds later dates the rollups of the new
+version are derived from the previous ones instead of a full rebuild.
+Versions are cached with compact column types (see :mod:`finance.dtypes`).
+"""
+import pandas as pd
+
+from finance import dtypes, rollups, storage
+from finance.cache import dataset_cache, register_fingerprint
+
+
+def version_key(entry):
+    """Return the cache key of the current version of a manifest entry."""
+    return f"{entry['id']}:v{entry.get('version', 1)}"
+
+
+def load(user_dir, entry):
+    """Return the current version of a stored dataset, shared between sessions."""
+    key = version_key(entry)
+    df = dataset_cache.get(key)
+    if df is None:
+        df, _ = dtypes.normalize(storage.load_dataset(user_dir, entry["id"], entry=entry))
+        dataset_cache.put(key, register_fingerprint(df, key))
+    return df
+
+
+def _extends(df, delta):
+    # Rollups can be extended only when the delta adds whole new dates
+    return (
+        set(rollups.VALUE_COLUMNS) <= set(delta.columns)
+        and list(delta.columns) == list(df.columns)
+        and len(df) > 0 and len(delta) > 0
+        and pd.to_datetime(delta["Date"]).min() > df["Date"].max()
+    )
+
+
+def append(user_dir, dataset_id, delta, data_hash=None):
+    """Append ``delta`` to a stored dataset and return ``(entry, df)`` for the new version."""
+    previous = storage.get_dataset(user_dir, dataset_id)
+    if previous is None:
+        raise KeyError(f"Unknown dataset: {dataset_id}")
+    entry = storage.append_to_dataset(user_dir, dataset_id, delta, data_hash=data_hash)
+    if entry["version"] == previous.get("version", 1):
+        return entry, load(user_dir, entry)
+
+    cached = dataset_cache.get(version_key(previous))
+    if cached is None or entry["version"] != previous.get("version", 1) + 1:
+        return entry, load(user_dir, entry)
+
+    # Read the delta back from its segment so dtypes match the stored version
+    try:
+        delta = storage.load_delta(user_dir, entry, entry["version"])
+    except (KeyError, FileNotFoundError):
+        # Already merged by a background compaction
+        return entry, load(user_dir, entry)
+    # Categories of the delta may differ from the cached version's
+    df, _ = dtypes.normalize(storage.apply_delta(cached, delta))
+    key = version_key(entry)
+    dataset_cache.put(key, register_fingerprint(df, key))
+    if "Date" in cached.columns and _extends(cached, delta):
+        rollups.append_rows(cached, delta, df)
+    return entry, df
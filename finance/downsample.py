@@ -0,0 +1,70 @@
+"""Server-side downsampling of long time series before they reach plotly.
+
+A browser chart cannot show more points than it has pixels, so line charts are
+reduced to about ``CHART_POINTS`` points per series with Largest-Triangle-
+Three-Buckets (LTTB), which keeps peaks, troughs and the overall shape. The
+Data tab and CSV export keep using the full-resolution frame.
+"""
+import numpy as np
+import pandas as pd
+
+from finance.cache import FrameMemo
+
+# Roughly two points per horizontal pixel of a full-width chart
+CHART_POINTS = 2000
+
+_memo = FrameMemo(max_entries=32)
+
+
+def clear_memo():
+    _memo.clear()
+
+
+def _numeric(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy().astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.to_numpy(dtype=float)
+
+
+def lttb_indices(x, y, threshold):
+    """Return the indices of the ``threshold`` points LTTB keeps from ``(x, y)``."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Buckets cover points 1..n-2; the first and last points are always kept
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(int) + 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(df, x, y_columns, max_points=CHART_POINTS):
+    """Return at most about ``max_points`` rows per series of ``df`` for plotting.
+
+    The rows kept are the union of the LTTB selections of every ``y_columns``
+    series, so all series of a wide-format chart share their x values.
+    """
+    if len(df) <= max_points:
+        return df
+
+    def compute(frame):
+        xs = _numeric(frame[x])
+        keep = np.unique(np.concatenate([
+            lttb_indices(xs, _numeric(frame[column]), max_points) for column in y_columns
+        ]))
+        return frame.iloc[keep]
+
+    return _memo.get_or_compute(("lttb", x, tuple(y_columns), max_points), df, compute)
@@ -0,0 +1,136 @@
+"""Compact column types for uploaded and stored datasets.
+
+Frames coming out of the readers keep whatever types the parser guessed:
+numbers in spreadsheets mixed with text arrive as objects, dates as strings,
+entity and category names as one string per row. :func:`normalize` infers a
+tighter type per column once, when a dataset is ingested or loaded:
+
+* text columns holding only numbers become numbers, and date columns
+  (``Date`` or a name mentioning a date) become datetimes; identifiers
+  (``KEY_COLUMNS``) and zero-padded codes such as ``"00123"`` stay text;
+* text repeating a few distinct values becomes a categorical;
+* integers shrink to the smallest type holding their values, but not below
+  ``MIN_INT_BITS`` so arithmetic on them does not silently wrap around;
+* floats become float32 only where that loses nothing.
+
+Feather keeps these types, so normalized datasets are stored compact too.
+"""
+import numpy as np
+import pandas as pd
+
+from finance.cache import frame_nbytes
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+MIN_INT_BITS = 32
+DATE_NAMES = ("date", "дата")
+# Product and hierarchy names (see ``ingest.HIERARCHY_COLUMNS``) are keys, never numbers
+KEY_COLUMNS = ("Product", "Entity", "Category")
+
+_INT_TYPES = [dtype for dtype in (np.int8, np.int16, np.int32, np.int64) if np.iinfo(dtype).bits >= MIN_INT_BITS]
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _is_date_name(name):
+    name = str(name).casefold()
+    return any(part in name for part in DATE_NAMES)
+
+
+def _parsed(series, parse):
+    # Accept a parse only if it keeps every value that was present
+    parsed = parse(series)
+    if parsed.notna().sum() == series.notna().sum():
+        return parsed
+    return None
+
+
+def _zero_padded(series):
+    # "007" or "-0123" would lose their leading zeros as numbers; "0" and "0.5" would not
+    return series.dropna().astype(str).str.match(r"\s*[+-]?0\d").any()
+
+
+def _text_column(name, series):
+    if name not in KEY_COLUMNS and series.notna().any():
+        numbers = _parsed(series, lambda s: pd.to_numeric(s, errors="coerce"))
+        if numbers is not None and not _zero_padded(series):
+            return _numeric_column(numbers)
+        if _is_date_name(name):
+            dates = _parsed(series, lambda s: pd.to_datetime(s, errors="coerce", format="mixed"))
+            if dates is not None:
+                return dates
+    if len(series) and series.nunique(dropna=True) <= CATEGORY_RATIO * len(series):
+        return series.astype("category")
+    return series
+
+
+def _integer_column(series):
+    values = series.to_numpy()
+    if len(values) == 0:
+        return series
+    low, high = values.min(), values.max()
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return series if series.dtype == dtype else series.astype(dtype)
+    return series
+
+
+def _float_column(series):
+    values = series.to_numpy()
+    finite = np.isfinite(values)
+    if finite.all() and len(values) and np.array_equal(values, np.round(values)):
+        # Whole numbers, e.g. volumes summed as floats
+        if np.abs(values).max() < 2 ** 53:
+            return _integer_column(series.astype(np.int64))
+    if series.dtype == np.float64:
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+            return series.astype(np.float32)
+    return series
+
+
+def _numeric_column(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+        return _integer_column(series)
+    if pd.api.types.is_float_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+        return _float_column(series)
+    return series
+
+
+def _column(name, series):
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series
+    if _is_text(series):
+        return _text_column(name, series)
+    return _numeric_column(series)
+
+
+def normalize(df):
+    """Return ``(df, stats)`` with every column in its most compact lossless type.
+
+    ``df`` itself is returned when no column changes; otherwise a new frame
+    shares the unchanged columns with it. ``stats`` has the memory use in
+    bytes before and after and the changed columns with their new types.
+    """
+    before = frame_nbytes(df)
+    changed = {}
+    for name, series in df.items():
+        result = _column(name, series)
+        if result is not series:
+            changed[name] = result
+    if changed:
+        df = df.copy(deep=False)
+        for name, series in changed.items():
+            df[name] = series
+    after = frame_nbytes(df) if changed else before
+    return df, {
+        "bytes_before": before,
+        "bytes_after": after,
+        "columns": {str(name): str(series.dtype) for name, series in changed.items()},
+    }
+
@@ -0,0 +1,158 @@
+"""Dataset downloads in CSV, Parquet and XLSX, built only when requested.
+
+An export is written chunk by chunk from the shared, read-only dataset to a
+file, so at most ``CHUNK_ROWS`` rows are converted at a time instead of the
+whole file being rendered in memory. Exports are keyed by the dataset's
+fingerprint, the format and the date range. For stored datasets the
+fingerprint is the version key, so the artifact for a given dataset version
+and filter is written once. Later downloads, from any session, read the file
+back. The artifact directory is pruned least-recently-used beyond
+``MAX_BYTES``.
+"""
+import hashlib
+import importlib.util
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from finance.cache import dataset_fingerprint
+from finance.timeindex import date_bounds, sorted_by_date
+
+CHUNK_ROWS = 50_000
+# Rows per sheet Excel can open, including the header row
+XLSX_MAX_ROWS = 1_048_575
+EXPORT_DIR = Path(os.environ.get("FINANCE_EXPORT_DIR", Path(tempfile.gettempdir()) / "finance-exports"))
+MAX_BYTES = int(os.environ.get("FINANCE_EXPORT_MAX_MB", 1024)) * 1024 * 1024
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def _write_csv(df, path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(_chunks(df)):
+            chunk.to_csv(f, header=i == 0, index=False)
+        if len(df) == 0:
+            df.to_csv(f, index=False)
+
+
+def _write_parquet(df, path):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_xlsx(df, path):
+    # Imported here: only XLSX exports need openpyxl
+    from openpyxl import Workbook
+
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"XLSX holds at most {XLSX_MAX_ROWS} rows, the export has {len(df)}")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append([str(column) for column in df.columns])
+    for chunk in _chunks(df):
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+
+# name -> (label, file extension, MIME type, writer)
+FORMATS = {
+    "csv": ("CSV", "csv", "text/csv", _write_csv),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet", _write_parquet),
+    "xlsx": ("Excel (XLSX)", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", _write_xlsx),
+}
+
+
+def available_formats(rows=0):
+    """Return the names of the formats that can export ``rows`` rows here."""
+    names = ["csv", "parquet"]
+    if importlib.util.find_spec("openpyxl") is not None and rows <= XLSX_MAX_ROWS:
+        names.append("xlsx")
+    return names
+
+
+def file_name(stem, fmt):
+    return f"{stem}.{FORMATS[fmt][1]}"
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][2]
+
+
+def _select(df, start, end):
+    if "Date" not in df.columns or (start is None and end is None):
+        return df
+    df = sorted_by_date(df)
+    lo, hi = date_bounds(df, start, end)
+    return df.iloc[lo:hi]
+
+
+def _artifact_path(df, fmt, start, end):
+    key = "\x1f".join([dataset_fingerprint(df), fmt, str(start), str(end)])
+    return EXPORT_DIR / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.{FORMATS[fmt][1]}"
+
+
+def _lock_for(path):
+    with _locks_guard:
+        return _locks.setdefault(path.name, threading.Lock())
+
+
+def _prune():
+    files = []
+    for path in EXPORT_DIR.glob("*.*"):
+        # Files being written are hidden until complete
+        if path.name.startswith("."):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def export(df, fmt, start=None, end=None):
+    """Return the path of ``df`` exported as ``fmt``, limited to ``start <= Date <= end``.
+
+    The artifact is written on the first request and reused afterwards.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    path = _artifact_path(df, fmt, start, end)
+    with _lock_for(path):
+        if path.exists():
+            # Mark as recently used for pruning
+            os.utime(path)
+            return path
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        try:
+            FORMATS[fmt][3](_select(df, start, end), tmp)
+            tmp.replace(path)
+        finally:
+            tmp.unlink(missing_ok=True)
+    _prune()
+    return path
+
+
+def export_bytes(df, fmt, start=None, end=None):
+    """Return the contents of :func:`export`, e.g. for a download button."""
+    return export(df, fmt, start, end).read_bytes()
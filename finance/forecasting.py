@@ -0,0 +1,71 @@
+"""Monte Carlo revenue forecasts for the "Прогнозы" page.
+
+Monthly revenue growth is simulated as i.i.d. normal log-returns for many
+paths at once: an N x T matrix of draws is accumulated along the time axis,
+and the scenario lines are percentiles across paths. The distribution is
+calibrated so that growth over the whole horizon has its 5th percentile at
+the conservative rate and its 95th percentile at the optimistic rate chosen on
+the page. A seeded generator makes the same inputs produce the same forecast.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = {"Conservative": 5, "Base Case": 50, "Optimistic": 95}
+DEFAULT_PATHS = 100_000
+DEFAULT_SEED = 42
+
+# z-score of the 95th percentile of the standard normal distribution
+_Z95 = 1.6448536269514722
+
+
+def growth_parameters(growth_conservative, growth_optimistic, steps):
+    """Return the monthly log-growth mean and deviation for the given horizon rates (%)."""
+    low = np.log1p(growth_conservative / 100)
+    high = np.log1p(growth_optimistic / 100)
+    if high < low:
+        low, high = high, low
+    mean = (low + high) / 2 / steps
+    std = (high - low) / (2 * _Z95) / np.sqrt(steps)
+    return mean, std
+
+
+def simulate_paths(base_revenue, mean, std, periods=12, paths=DEFAULT_PATHS, seed=DEFAULT_SEED):
+    """Return a ``paths x periods`` array of simulated revenue, starting at ``base_revenue``."""
+    rng = np.random.default_rng(seed)
+    log_growth = np.empty((paths, periods))
+    log_growth[:, 0] = 0.0
+    log_growth[:, 1:] = rng.normal(mean, std, size=(paths, periods - 1))
+    # Cumulative sum of log-returns is the cumulative product of growth factors
+    np.cumsum(log_growth, axis=1, out=log_growth)
+    np.exp(log_growth, out=log_growth)
+    log_growth *= base_revenue
+    return log_growth
+
+
+def percentile_bands(simulated, percentiles=PERCENTILES):
+    """Return a dict of scenario name -> per-period percentile of the simulated paths."""
+    names = list(percentiles)
+    values = np.percentile(simulated, [percentiles[name] for name in names], axis=0)
+    return dict(zip(names, values))
+
+
+@lru_cache(maxsize=32)
+def _forecast(base_revenue, growth_conservative, growth_optimistic, periods, paths, seed, start):
+    mean, std = growth_parameters(growth_conservative, growth_optimistic, periods - 1)
+    bands = percentile_bands(simulate_paths(base_revenue, mean, std, periods, paths, seed))
+    df = pd.DataFrame(bands, index=pd.date_range(start=start, periods=periods, freq="ME"))
+    df.index.name = "Date"
+    return df.reset_index()
+
+
+def generate_scenarios(base_revenue=100000, growth_conservative=5, growth_optimistic=15,
+                       periods=12, paths=DEFAULT_PATHS, seed=DEFAULT_SEED):
+    """Forecast revenue and return P5/P50/P95 paths as Conservative/Base Case/Optimistic.
+
+    Results are cached per set of inputs; treat the returned frame as read-only.
+    """
+    start = datetime.now().replace(day=1).date()
+    return _forecast(base_revenue, growth_conservative, growth_optimistic, periods, paths, seed, start)
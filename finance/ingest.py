@@ -0,0 +1,258 @@
+"""Chunked ingestion of uploaded CSV and Excel files.
+
+Large general-ledger exports never exist as one DataFrame: the file is read in
+chunks of ``CHUNK_ROWS`` rows, each chunk is validated and coerced to the
+expected schema and folded into running aggregates, so peak memory depends on
+the chunk size and the number of periods/products rather than on the file size.
+
+Two schemas are recognised:
+
+* financial -- ``Date``, ``Revenue``, ``Costs`` and optionally ``Profit``;
+  rows are summed per month (``freq``) and dated at its end, except a last
+  month the file stops short of, which is dated at its last day (see
+  :func:`finance.timeseries.complete_months`);
+* unit economics -- ``Product``, ``Price``, ``Cost``, ``Volume`` and
+  optionally the ``HIERARCHY_COLUMNS`` (legal entity, category); rows are
+  combined per product within its entity and category with volume-weighted
+  prices.
+
+Files with any other layout are passed through unchanged. Every result is
+then given compact column types (see :mod:`finance.dtypes`).
+"""
+import numpy as np
+import pandas as pd
+
+from finance import dtypes
+
+CHUNK_ROWS = 100_000
+
+FINANCIAL = "financial"
+UNIT_ECONOMICS = "unit_economics"
+OTHER = "other"
+
+FINANCIAL_COLUMNS = ["Revenue", "Costs", "Profit"]
+UNIT_SUM_COLUMNS = ["Volume", "Total Revenue", "Total Cost"]
+UNIT_VALUE_COLUMNS = ["Price", "Cost", "Margin", "Margin %", "Volume", "Total Revenue", "Total Cost", "Total Profit"]
+# Levels products are consolidated along, outermost first
+HIERARCHY_COLUMNS = ["Entity", "Category"]
+
+
+def detect_schema(columns):
+    columns = set(columns)
+    if {"Date", "Revenue", "Costs"} <= columns:
+        return FINANCIAL
+    if {"Product", "Price", "Cost", "Volume"} <= columns:
+        return UNIT_ECONOMICS
+    return OTHER
+
+
+class _FinancialAggregator:
+    def __init__(self, freq):
+        self.freq = freq
+        self.partials = []
+        self.last = None
+        # Last day of an incomplete last period, once the result is built
+        self.partial_through = None
+
+    def add(self, chunk):
+        dates = pd.to_datetime(chunk["Date"], errors="coerce")
+        values = chunk[["Revenue", "Costs"]].apply(pd.to_numeric, errors="coerce")
+        if "Profit" in chunk.columns:
+            values["Profit"] = pd.to_numeric(chunk["Profit"], errors="coerce")
+        else:
+            values["Profit"] = values["Revenue"] - values["Costs"]
+        valid = dates.notna().to_numpy() & values.notna().all(axis=1).to_numpy()
+        periods = dates[valid].dt.to_period(self.freq)
+        if valid.any():
+            last = dates[valid].max()
+            self.last = last if self.last is None else max(self.last, last)
+        self.partials.append(values[valid].groupby(periods.to_numpy()).sum())
+        # Fold partial aggregates now and then so their number stays bounded
+        if len(self.partials) >= 16:
+            self.partials = [pd.concat(self.partials).groupby(level=0).sum()]
+        return int((~valid).sum())
+
+    def result(self):
+        if not self.partials:
+            return pd.DataFrame(columns=["Date"] + FINANCIAL_COLUMNS)
+        totals = pd.concat(self.partials).groupby(level=0).sum().sort_index()
+        dates = pd.PeriodIndex(totals.index).to_timestamp(how="end").normalize()
+        if self.last is not None and self.last.normalize() < dates[-1]:
+            # An incomplete last period is dated at its last day, never in the future
+            self.partial_through = self.last.normalize()
+            dates = dates[:-1].append(pd.DatetimeIndex([self.partial_through]))
+        df = totals.reset_index(drop=True)
+        df.insert(0, "Date", dates)
+        return df
+
+
+def unit_values(totals):
+    """Return unit economics columns from per-group ``UNIT_SUM_COLUMNS`` totals.
+
+    Prices and costs are volume-weighted averages of the group.
+    """
+    volume = totals["Volume"].to_numpy()
+    revenue = totals["Total Revenue"].to_numpy()
+    total_cost = totals["Total Cost"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = revenue / volume
+        cost = total_cost / volume
+        margin = price - cost
+        margin_pct = margin / price * 100
+    return pd.DataFrame({
+        "Price": price,
+        "Cost": cost,
+        "Margin": margin,
+        "Margin %": margin_pct,
+        "Volume": volume,
+        "Total Revenue": revenue,
+        "Total Cost": total_cost,
+        "Total Profit": revenue - total_cost,
+    })
+
+
+class _UnitEconomicsAggregator:
+    def __init__(self):
+        self.partials = []
+        self.keys = None
+
+    def add(self, chunk):
+        if self.keys is None:
+            self.keys = [c for c in HIERARCHY_COLUMNS if c in chunk.columns] + ["Product"]
+        price = pd.to_numeric(chunk["Price"], errors="coerce")
+        cost = pd.to_numeric(chunk["Cost"], errors="coerce")
+        volume = pd.to_numeric(chunk["Volume"], errors="coerce")
+        valid = (chunk["Product"].notna() & price.notna() & cost.notna() & volume.notna()).to_numpy()
+        sums = pd.DataFrame({
+            "Volume": volume[valid],
+            "Total Revenue": (price * volume)[valid],
+            "Total Cost": (cost * volume)[valid],
+        })
+        # Missing entity or category values form their own "" group
+        keys = [chunk[c][valid].fillna("").astype(str).to_numpy() for c in self.keys]
+        self.partials.append(sums.groupby(keys).sum())
+        if len(self.partials) >= 16:
+            self.partials = [self._combine()]
+        return int((~valid).sum())
+
+    def _combine(self):
+        return pd.concat(self.partials).groupby(level=list(range(len(self.keys)))).sum()
+
+    def result(self):
+        if not self.partials:
+            return pd.DataFrame(columns=["Product"] + UNIT_VALUE_COLUMNS)
+        totals = self._combine()
+        keys = pd.DataFrame({
+            column: totals.index.get_level_values(i).to_numpy() for i, column in enumerate(self.keys)
+        })
+        return pd.concat([keys, unit_values(totals)], axis=1)
+
+
+class _PassThrough:
+    def __init__(self):
+        self.chunks = []
+
+    def add(self, chunk):
+        self.chunks.append(chunk)
+        return 0
+
+    def result(self):
+        return pd.concat(self.chunks, ignore_index=True) if self.chunks else pd.DataFrame()
+
+
+def _make_aggregator(schema, freq):
+    if schema == FINANCIAL:
+        return _FinancialAggregator(freq)
+    if schema == UNIT_ECONOMICS:
+        return _UnitEconomicsAggregator()
+    return _PassThrough()
+
+
+def _csv_dtypes(fileobj):
+    # The parser would turn codes such as "00123" into numbers; read keys, and every
+    # column of files passed through, as text and leave typing to dtypes.normalize
+    columns = pd.read_csv(fileobj, nrows=0).columns
+    fileobj.seek(0)
+    if detect_schema(columns) == OTHER:
+        return str
+    return {column: str for column in columns if column in dtypes.KEY_COLUMNS}
+
+
+def _csv_chunks(fileobj, chunk_rows, progress):
+    fileobj.seek(0, 2)
+    total = fileobj.tell() or 1
+    fileobj.seek(0)
+    for chunk in pd.read_csv(fileobj, chunksize=chunk_rows, dtype=_csv_dtypes(fileobj)):
+        if progress is not None:
+            progress(min(fileobj.tell() / total, 1.0))
+        yield chunk
+
+
+def _xlsx_chunks(fileobj, chunk_rows, progress):
+    # openpyxl is what pandas uses for .xlsx; read-only mode streams rows from the archive
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row or 0
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+        batch, seen = [], 1
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                seen += len(batch)
+                if progress is not None and total:
+                    progress(min(seen / total, 1.0))
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def _read_chunks(fileobj, name, chunk_rows, progress):
+    name = name.lower()
+    if name.endswith(".csv"):
+        return _csv_chunks(fileobj, chunk_rows, progress)
+    if name.endswith(".xlsx"):
+        return _xlsx_chunks(fileobj, chunk_rows, progress)
+    # Legacy .xls cannot be streamed; read it whole
+    return iter([pd.read_excel(fileobj)])
+
+
+def ingest(fileobj, name, chunk_rows=CHUNK_ROWS, freq="M", progress=None):
+    """Read an uploaded file chunk by chunk and return ``(df, stats)``.
+
+    ``progress`` is called with the completed fraction (0..1) after each chunk.
+    ``stats`` reports the detected schema, rows read, rows dropped because
+    their date or numbers could not be parsed, the last day of an incomplete
+    last month of P&L data (``partial_through``), and the memory use of the
+    result before and after its column types were normalized.
+    """
+    aggregator = None
+    stats = {"schema": OTHER, "rows_read": 0, "rows_dropped": 0, "chunks": 0, "partial_through": None}
+
+    for chunk in _read_chunks(fileobj, name, chunk_rows, progress):
+        if aggregator is None:
+            stats["schema"] = detect_schema(chunk.columns)
+            aggregator = _make_aggregator(stats["schema"], freq)
+        stats["rows_read"] += len(chunk)
+        stats["rows_dropped"] += aggregator.add(chunk)
+        stats["chunks"] += 1
+
+    if aggregator is None:
+        raise ValueError("Файл не содержит данных")
+    df, normalized = dtypes.normalize(aggregator.result())
+    if stats["schema"] == FINANCIAL:
+        stats["partial_through"] = aggregator.partial_through
+    stats["bytes_before"] = normalized["bytes_before"]
+    stats["bytes_after"] = normalized["bytes_after"]
+    if progress is not None:
+        progress(1.0)
+    return df, stats
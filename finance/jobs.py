@@ -0,0 +1,180 @@
+"""Background jobs that keep running across reruns and page switches.
+
+Uploads and analyses are submitted as jobs instead of running inside the
+rerun that asked for them, so the session stays responsive: the rerun records
+the job (analyses in ``state['jobs']``, uploads by their content hash) and
+returns, and later reruns poll the job's progress until it has finished. Jobs run on a thread pool shared by every
+session; CPU-heavy work inside a job is still handed to the process pool in
+:mod:`finance.workers`.
+
+Jobs are registered process-wide under a key derived from their input, so a
+job that is already running or has finished is reused instead of started
+again, whether the same session asks twice or another session asks for the
+same data. The most recent ``MAX_FINISHED`` finished jobs keep their results.
+Jobs producing datasets are forgotten as soon as the dataset is in
+:data:`finance.cache.dataset_cache`, so frames only stay in memory under the
+cache's byte budget.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from finance import telemetry
+
+JOB_THREADS = int(os.environ.get("FINANCE_JOB_THREADS", 4))
+MAX_FINISHED = 64
+# How often a page showing a running job checks on it
+POLL_SECONDS = 0.5
+# Jobs finishing within this time are shown in the same rerun, without polling
+INLINE_SECONDS = 0.2
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_executor = None
+_jobs = OrderedDict()
+_keys = {}
+_lock = threading.Lock()
+
+
+class Job:
+    """A unit of background work with progress reporting."""
+
+    def __init__(self, kind, key, label):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.label = label
+        self.created = time.time()
+        self.finished = None
+        self.progress = 0.0
+        self.message = None
+        self.started = False
+        # Run time in seconds once finished, for the timing of the rerun showing the result
+        self.seconds = None
+        self.future = None
+
+    def update(self, fraction, text=None):
+        """Report progress; passed to the job's function as its progress callback."""
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if text is not None:
+            self.message = text
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return RUNNING if self.started else QUEUED
+        return FAILED if self.future.exception() is not None else DONE
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+    def error(self):
+        return self.future.exception() if self.future.done() else None
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(JOB_THREADS, thread_name_prefix="finance-job")
+        return _executor
+
+
+def _run(job, fn):
+    job.started = True
+    start = time.perf_counter()
+    try:
+        return fn(job.update)
+    finally:
+        job.seconds = time.perf_counter() - start
+        job.finished = time.time()
+        job.progress = 1.0
+        _evict()
+
+
+def _evict():
+    with _lock:
+        finished = [job for job in _jobs.values() if job.finished is not None]
+        for job in finished[:max(len(finished) - MAX_FINISHED, 0)]:
+            del _jobs[job.id]
+            if _keys.get(job.key) == job.id:
+                del _keys[job.key]
+
+
+def submit(kind, fn, key=None, label=None):
+    """Run ``fn(progress)`` in the background and return its :class:`Job`.
+
+    A job with the same ``key`` that is still running or has succeeded is
+    returned instead of starting ``fn`` again.
+    """
+    executor = _get_executor()
+    with _lock:
+        existing = _jobs.get(_keys.get(key)) if key is not None else None
+        if existing is not None and existing.status != FAILED:
+            return existing
+        job = Job(kind, key, label or kind)
+        _jobs[job.id] = job
+        if key is not None:
+            _keys[key] = job.id
+        job.future = executor.submit(_run, job, fn)
+    return job
+
+
+def wait(job, timeout):
+    """Wait up to ``timeout`` seconds for ``job``; return True if it has finished."""
+    return bool(wait_futures([job.future], timeout=timeout).done)
+
+
+def forget(job):
+    """Drop ``job`` from the registry, e.g. once its result has been handed to a cache.
+
+    Callers still holding the job can read its result; the result is freed
+    with the last reference.
+    """
+    with _lock:
+        _jobs.pop(job.id, None)
+        if _keys.get(job.key) == job.id:
+            del _keys[job.key]
+
+
+def get(job_id):
+    """Return the job with ``job_id``, or None once it has been forgotten."""
+    return _jobs.get(job_id)
+
+
+# Session helpers: a session remembers its jobs by the name of the result they produce
+
+def track(state, name, job):
+    """Remember ``job`` as the session's job producing result ``name``."""
+    state.setdefault("jobs", {})[name] = job.id
+
+
+def session_job(state, name):
+    """Return the session's job for result ``name``, or None."""
+    job_id = state.get("jobs", {}).get(name)
+    return get(job_id) if job_id is not None else None
+
+
+def collect(state):
+    """Move results of the session's finished analysis jobs into ``state['analysis_results']``.
+
+    Failed jobs stay tracked so the page can show their error.
+    """
+    tracked = state.get("jobs", {})
+    for name, job_id in list(tracked.items()):
+        job = get(job_id)
+        if job is None:
+            del tracked[name]
+        elif job.kind == "analysis" and job.status == DONE:
+            state["analysis_results"][name] = job.result()
+            del tracked[name]
+            telemetry.attach("analysis", job.seconds, kind=name)
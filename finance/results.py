@@ -0,0 +1,98 @@
+"""Structured results of the analyses.
+
+``analyze_*`` return these compact, immutable records of numeric findings and
+recommendation codes instead of Markdown; :mod:`finance.templates` renders
+them at display time in the reader's locale. Results are what sessions keep in
+``analysis_results`` and what crosses process boundaries, so they hold no
+frames and no text beyond the product and group names they refer to.
+"""
+from dataclasses import dataclass
+from datetime import date
+
+
+@dataclass(frozen=True, slots=True)
+class FinancialAnalysis:
+    # Last period compared with the first one
+    revenue_up: bool
+    costs_up: bool
+    profit_up: bool
+    revenue_growth: float
+    costs_growth: float
+    profit_growth: float
+    avg_margin: float
+    best_month: date
+    best_month_revenue: float
+    best_month_profit: float
+    loss_months: tuple
+    # None when the data is too short or lacks summer or winter months
+    summer_avg: float | None
+    winter_avg: float | None
+    # "summer", "winter", "none", or None without seasonality figures
+    season: str | None
+    # From the seasonal decomposition of monthly revenue; None with less than
+    # ``timeseries.MIN_SEASONS`` years of data
+    seasonal_strength: float | None
+    peak_month: int | None
+    trough_month: int | None
+    # The largest anomalies of the monthly series and how many there are in all
+    anomalies: tuple
+    anomaly_count: int
+    recommendations: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class Anomaly:
+    # "Revenue", "Costs" or "Profit"
+    series: str
+    month: date
+    value: float
+    # Trend plus season: what the month would have been without the anomaly
+    expected: float
+
+
+@dataclass(frozen=True, slots=True)
+class GroupFindings:
+    level: str
+    count: int
+    best: str
+    best_profit: float
+    best_margin_pct: float
+    worst: str
+    worst_profit: float
+
+
+@dataclass(frozen=True, slots=True)
+class UnitEconomicsAnalysis:
+    avg_price: float
+    avg_margin_pct: float
+    best_margin_product: str
+    best_margin_pct: float
+    worst_margin_product: str
+    worst_margin_pct: float
+    best_profit_product: str
+    best_profit: float
+    worst_profit_product: str
+    worst_profit: float
+    low_margin_products: tuple
+    low_margin_count: int
+    low_volume_high_margin: tuple
+    low_volume_high_margin_count: int
+    groups: tuple
+    recommendations: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastAnalysis:
+    periods: int
+    scenarios: tuple
+    growth: tuple
+    monthly_growth: tuple
+    # Optimistic over conservative at the end of the horizon, in percent
+    spread: float
+    # Optimistic minus conservative relative to the base case, in percent
+    risk_gap: float
+    recommendations: tuple
+
+    def scenario(self, values, name, default=0.0):
+        """Return the entry of ``values`` (e.g. ``self.growth``) for scenario ``name``."""
+        return values[self.scenarios.index(name)] if name in self.scenarios else default
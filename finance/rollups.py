@@ -0,0 +1,119 @@
+"""Pre-aggregated Revenue/Costs/Profit tables for the Dashboard and P&L pages.
+
+A :class:`Rollups` object is built once per dataset (memoized by fingerprint)
+and holds daily, monthly, quarterly and yearly sums plus the first and last
+rows needed for the KPI deltas, so reruns read a handful of small tables
+instead of scanning the full frame. Appended rows are folded in with
+:meth:`Rollups.append` without touching the existing history.
+"""
+import pandas as pd
+
+from finance import timeseries
+from finance.cache import FrameMemo
+
+VALUE_COLUMNS = ["Revenue", "Costs", "Profit"]
+GRAINS = {"daily": "D", "monthly": "M", "quarterly": "Q", "yearly": "Y"}
+
+_memo = FrameMemo()
+
+
+def clear_memo():
+    _memo.clear()
+
+
+def _period_frame(table):
+    """Turn a period-indexed table into a frame with a month/quarter-end ``Date`` column."""
+    df = table.reset_index(drop=True)
+    df.insert(0, "Date", table.index.to_timestamp(how="end").normalize())
+    return df
+
+
+class Rollups:
+    """Aggregates of a financial dataset at every reporting grain."""
+
+    def __init__(self, tables, totals, first, last, rows):
+        self.tables = tables
+        self.totals = totals
+        self.first = first
+        self.last = last
+        self.rows = rows
+
+    @classmethod
+    def build(cls, df):
+        dates = pd.DatetimeIndex(pd.to_datetime(df["Date"]))
+        values = df[VALUE_COLUMNS].astype(float)
+
+        daily = values.groupby(dates.to_period("D")).sum()
+        tables = {"daily": daily}
+        for grain, freq in GRAINS.items():
+            if grain != "daily":
+                tables[grain] = daily.groupby(daily.index.asfreq(freq)).sum()
+
+        first, last = dates.argmin(), dates.argmax()
+        return cls(
+            tables=tables,
+            totals=values.sum(),
+            first=(dates[first], values.iloc[first]),
+            last=(dates[last], values.iloc[last]),
+            rows=len(df),
+        )
+
+    def append(self, delta):
+        """Return new rollups covering the current data plus the ``delta`` rows."""
+        other = Rollups.build(delta)
+        tables = {
+            grain: table.add(other.tables[grain], fill_value=0).sort_index()
+            for grain, table in self.tables.items()
+        }
+        return Rollups(
+            tables=tables,
+            totals=self.totals + other.totals,
+            first=other.first if other.first[0] < self.first[0] else self.first,
+            last=other.last if other.last[0] >= self.last[0] else self.last,
+            rows=self.rows + other.rows,
+        )
+
+    def table(self, grain="monthly"):
+        """Return the aggregates at ``grain`` as a frame with a ``Date`` column."""
+        return _period_frame(self.tables[grain])
+
+    def kpis(self):
+        """Return totals and first-to-last changes for the Dashboard metrics."""
+        first, last = self.first[1], self.last[1]
+        daily = self.tables["daily"]
+        complete = timeseries.complete_months(daily.index.to_timestamp())
+        if not complete.all():
+            # Compare with the last complete month instead of an incomplete one
+            last = daily[complete].iloc[-1]
+        kpis = {}
+        for column in VALUE_COLUMNS:
+            kpis[column] = {
+                "total": self.totals[column],
+                "change_pct": (last[column] / first[column] - 1) * 100,
+            }
+        kpis["Margin"] = {
+            "total": self.totals["Profit"] / self.totals["Revenue"] * 100,
+            "change_pp": (last["Profit"] / last["Revenue"] - first["Profit"] / first["Revenue"]) * 100,
+        }
+        return kpis
+
+    def year_over_year(self, column="Profit"):
+        """Return monthly ``column`` values with ``Year`` and ``Month`` columns."""
+        monthly = self.tables["monthly"]
+        return pd.DataFrame({
+            "Year": monthly.index.year,
+            "Month": monthly.index.month,
+            column: monthly[column].to_numpy(),
+        })
+
+
+def rollups_for(df):
+    """Return the memoized rollups of a financial frame."""
+    return _memo.get_or_compute("rollups", df, Rollups.build)
+
+
+def append_rows(df, delta, combined):
+    """Register rollups for ``combined`` derived incrementally from those of ``df``."""
+    rollups = rollups_for(df).append(delta)
+    _memo.put("rollups", combined, rollups)
+    return rollups
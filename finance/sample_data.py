@@ -0,0 +1,55 @@
+"""Sample data generators (in a real app, you'd fetch from an API or database)."""
+import numpy as np
+import pandas as pd
+
+
+def generate_financial_data(start_date, periods=12, freq="ME"):
+    dates = pd.date_range(start=start_date, periods=periods, freq=freq)
+
+    # Generate sample financial data
+    revenue = np.random.uniform(80000, 120000, size=periods) + np.linspace(0, 20000, periods)
+    costs = np.random.uniform(50000, 80000, size=periods) + np.linspace(0, 10000, periods)
+    profit = revenue - costs
+
+    df = pd.DataFrame({
+        'Date': dates,
+        'Revenue': revenue,
+        'Costs': costs,
+        'Profit': profit
+    })
+
+    return df
+
+
+def generate_unit_economics(product_count=5, entities=0, categories=0):
+    # Letters run out after 26 products; larger catalogs are numbered
+    if product_count <= 26:
+        products = [f"Product {chr(65+i)}" for i in range(product_count)]
+    else:
+        products = [f"Product {i + 1}" for i in range(product_count)]
+
+    price = np.random.uniform(50, 200, size=product_count)
+    cost = price * np.random.uniform(0.4, 0.7, size=product_count)
+    margin = price - cost
+    margin_pct = (margin / price) * 100
+    volume = np.random.randint(100, 5000, size=product_count)
+
+    df = pd.DataFrame({
+        'Product': products,
+        'Price': price,
+        'Cost': cost,
+        'Margin': margin,
+        'Margin %': margin_pct,
+        'Volume': volume,
+        'Total Revenue': price * volume,
+        'Total Cost': cost * volume,
+        'Total Profit': margin * volume
+    })
+
+    # Optional hierarchy: each product belongs to one category of one legal entity
+    if categories:
+        df.insert(0, 'Category', [f"Category {i + 1}" for i in np.random.randint(0, categories, size=product_count)])
+    if entities:
+        df.insert(0, 'Entity', [f"Entity {i + 1}" for i in np.random.randint(0, entities, size=product_count)])
+
+    return df
@@ -0,0 +1,435 @@
+"""Columnar per-user dataset store.
+
+Every saved dataset is written as uncompressed Arrow IPC (Feather v2) files so
+reads can memory-map them and only materialize the columns a page actually
+needs. A small ``manifest.json`` next to the data files lists the datasets of a
+user, so the sidebar picker never has to look at the data itself. CSV stays an
+import/export format only.
+
+Datasets are append-only and versioned: adding rows writes a delta segment and
+bumps the dataset's version instead of copying the history. In the data
+:func:`finance.ingest.ingest` aggregates, rows of a later segment replace
+earlier rows with the same key (the month of ``Date`` for P&L data,
+``Product`` within its entity and category for unit economics); every other
+dataset, and any whose keys repeat, just gains the rows. Once a dataset has ``COMPACT_SEGMENTS``
+segments they are merged back into one file in a background thread.
+
+The manifest doubles as the user's catalog: every write records row counts,
+schema, date coverage, size and content hash, so the sidebar can list, search
+and paginate datasets from that one small file. Parsed manifests are kept in
+memory and re-read only when the file changes on disk.
+"""
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from finance.cache import content_hash, frame_fingerprint
+from finance.ingest import FINANCIAL, HIERARCHY_COLUMNS, UNIT_ECONOMICS, detect_schema
+
+MANIFEST_NAME = "manifest.json"
+DATASETS_DIR = "datasets"
+DATE_COLUMNS = ("Date",)
+COMPACT_SEGMENTS = 8
+CATALOG_PAGE_SIZE = 20
+
+_locks = {}
+_locks_guard = threading.Lock()
+_compacting = set()
+_manifests = {}
+_migrating = set()
+
+
+def _lock_for(user_dir):
+    """Return the lock serializing manifest updates of one user within this process."""
+    key = Path(user_dir).resolve()
+    with _locks_guard:
+        return _locks.setdefault(key, threading.RLock())
+
+
+def _manifest_path(user_dir):
+    return Path(user_dir) / MANIFEST_NAME
+
+
+def _read_manifest(user_dir):
+    """Parse the manifest from disk; callers may modify the result and write it back."""
+    path = _manifest_path(user_dir)
+    if not path.exists():
+        return {"datasets": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _catalog(user_dir):
+    """Return the user's entries, newest first, parsing the manifest only when it changed.
+
+    The returned entries are shared and must not be modified.
+    """
+    path = _manifest_path(user_dir)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        # Saving the imported snapshots looks up the catalog being created
+        with _lock_for(user_dir):
+            if path in _migrating:
+                return []
+            _migrating.add(path)
+            try:
+                migrate_csv_snapshots(user_dir)
+            finally:
+                _migrating.discard(path)
+        return _catalog(user_dir) if path.exists() else []
+    version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    cached = _manifests.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    manifest = _read_manifest(user_dir)
+    if any("schema" not in entry for entry in manifest["datasets"]):
+        manifest = _backfill_catalog(user_dir)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    entries = sorted(manifest["datasets"], key=lambda entry: entry["created"], reverse=True)
+    _manifests[path] = (version, entries)
+    return entries
+
+
+def _write_manifest(user_dir, manifest):
+    # Write to a temporary file first so a crash never leaves a truncated manifest
+    path = _manifest_path(user_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _to_arrow(df):
+    """Convert a frame to an Arrow table with typed date columns, sorted by date."""
+    df = df.copy(deep=False)
+    for column in DATE_COLUMNS:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            try:
+                df[column] = pd.to_datetime(df[column])
+            except (ValueError, TypeError):
+                pass
+    # Keep datasets sorted by date so range queries can binary-search them
+    if "Date" in df.columns and not df["Date"].is_monotonic_increasing:
+        df = df.sort_values("Date", kind="stable", ignore_index=True)
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Spreadsheets often mix numbers and text in one column; store those as text
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].astype(str)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _date_coverage(table):
+    if "Date" not in table.column_names or table.num_rows == 0:
+        return None, None
+    bounds = pc.min_max(table["Date"]).as_py()
+    if not isinstance(bounds["min"], datetime):
+        return None, None
+    return bounds["min"].date().isoformat(), bounds["max"].date().isoformat()
+
+
+def _segment_metadata(path, table):
+    date_start, date_end = _date_coverage(table)
+    return {"rows": table.num_rows, "bytes": path.stat().st_size, "date_start": date_start, "date_end": date_end}
+
+
+def _write_segment(user_dir, df, data_hash, version):
+    datasets_dir = Path(user_dir) / DATASETS_DIR
+    datasets_dir.mkdir(parents=True, exist_ok=True)
+    file_name = f"{uuid.uuid4().hex}.arrow"
+    table = _to_arrow(df)
+    feather.write_feather(table, datasets_dir / file_name, compression="uncompressed")
+    segment = {"file": file_name, "hash": data_hash, "version": version}
+    segment.update(_segment_metadata(datasets_dir / file_name, table))
+    return segment, table.column_names
+
+
+def _update_catalog_fields(entry):
+    """Recompute the catalog fields of an entry from its segments."""
+    parts = segments(entry)
+    starts = [s["date_start"] for s in parts if s.get("date_start")]
+    ends = [s["date_end"] for s in parts if s.get("date_end")]
+    entry["schema"] = detect_schema(entry["columns"])
+    entry["bytes"] = sum(s.get("bytes", 0) for s in parts)
+    entry["date_start"] = min(starts) if starts else None
+    entry["date_end"] = max(ends) if ends else None
+    return entry
+
+
+def _backfill_catalog(user_dir):
+    """Add catalog fields to entries written before the catalog existed."""
+    with _lock_for(user_dir):
+        manifest = _read_manifest(user_dir)
+        for entry in manifest["datasets"]:
+            if "schema" in entry:
+                continue
+            entry["segments"] = segments(entry)
+            entry.pop("file", None)
+            for segment in entry["segments"]:
+                path = Path(user_dir) / DATASETS_DIR / segment["file"]
+                columns = ["Date"] if "Date" in entry["columns"] else []
+                segment.update(_segment_metadata(path, feather.read_table(path, columns=columns, memory_map=True)))
+            _update_catalog_fields(entry)
+        _write_manifest(user_dir, manifest)
+    return manifest
+
+
+def segments(entry):
+    """Return the segments of a manifest entry, oldest first."""
+    if "segments" in entry:
+        return entry["segments"]
+    # Entries written before versioning hold a single file
+    return [{"file": entry["file"], "rows": entry["rows"], "hash": entry.get("hash"), "version": 1}]
+
+
+def _contains_hash(entry, data_hash):
+    # Compacted segments remember the hashes of the segments they replaced
+    return entry.get("hash") == data_hash or any(
+        segment["hash"] == data_hash or data_hash in segment.get("hashes", ())
+        for segment in segments(entry)
+    )
+
+
+def key_columns(columns):
+    """Return the columns identifying a row of an aggregated schema, or an empty list.
+
+    Other layouts (ledgers passed through as they are) may hold several rows
+    per date or product and have no key.
+    """
+    schema = detect_schema(columns)
+    if schema == FINANCIAL:
+        return ["Date"]
+    if schema == UNIT_ECONOMICS:
+        return [column for column in HIERARCHY_COLUMNS if column in columns] + ["Product"]
+    return []
+
+
+def apply_delta(df, delta, keys=None):
+    """Return ``df`` with ``delta`` appended.
+
+    Delta rows replace rows with the same ``keys`` (by default the
+    :func:`key_columns` of the frames; dates match by month) when the key
+    identifies a single row in both frames; otherwise, as in migrated
+    snapshots that were never aggregated, all rows are kept.
+    """
+    combined = pd.concat([df, delta], ignore_index=True)
+    if keys is None:
+        keys = key_columns(combined.columns)
+    if keys:
+        # P&L rows stand for their month, which an incomplete month dates at its last day;
+        # a key column missing from one part counts as empty there
+        key = combined[keys]
+        if "Date" in keys:
+            key = key.assign(Date=pd.to_datetime(key["Date"], errors="coerce").dt.to_period("M"))
+        if not any(part.duplicated().any() for part in (key[:len(df)], key[len(df):])):
+            combined = combined[~key.duplicated(keep="last")]
+    if "Date" in combined.columns:
+        combined = combined.sort_values("Date", kind="stable")
+    return combined.reset_index(drop=True)
+
+
+def save_dataset(user_dir, df, name, created=None, data_hash=None):
+    """Persist a DataFrame as a new dataset (version 1) and register it in the manifest.
+
+    ``data_hash`` identifies the content (the raw upload bytes when available).
+    Saving content that is already stored returns the existing entry instead of
+    writing a duplicate.
+    """
+    user_dir = Path(user_dir)
+    if data_hash is None:
+        data_hash = frame_fingerprint(df)
+    with _lock_for(user_dir):
+        existing = find_dataset_by_hash(user_dir, data_hash)
+        if existing is not None:
+            return existing
+
+        segment, columns = _write_segment(user_dir, df, data_hash, version=1)
+        created = (created or datetime.now()).isoformat(timespec="seconds")
+        entry = {
+            "id": uuid.uuid4().hex,
+            "name": name,
+            "hash": data_hash,
+            "version": 1,
+            "segments": [segment],
+            "created": created,
+            "updated": created,
+            "rows": segment["rows"],
+            "columns": columns,
+        }
+        _update_catalog_fields(entry)
+        manifest = _read_manifest(user_dir)
+        manifest["datasets"].append(entry)
+        _write_manifest(user_dir, manifest)
+    return entry
+
+
+def append_to_dataset(user_dir, dataset_id, delta, data_hash=None):
+    """Add ``delta`` rows to a dataset as a new segment and return the updated entry.
+
+    Appending content that is already part of the dataset is a no-op. The
+    ``rows`` count of the entry is an upper bound until the next compaction,
+    since upserted rows are counted in both segments.
+    """
+    user_dir = Path(user_dir)
+    if data_hash is None:
+        data_hash = frame_fingerprint(delta)
+    with _lock_for(user_dir):
+        manifest = _read_manifest(user_dir)
+        entry = next((e for e in manifest["datasets"] if e["id"] == dataset_id), None)
+        if entry is None:
+            raise KeyError(f"Unknown dataset: {dataset_id}")
+        if _contains_hash(entry, data_hash):
+            return entry
+
+        version = entry.get("version", 1) + 1
+        segment, columns = _write_segment(user_dir, delta, data_hash, version)
+        entry["segments"] = segments(entry) + [segment]
+        entry.pop("file", None)
+        entry["version"] = version
+        entry["updated"] = datetime.now().isoformat(timespec="seconds")
+        entry["rows"] += segment["rows"]
+        entry["columns"] = list(dict.fromkeys(entry["columns"] + columns))
+        _update_catalog_fields(entry)
+        _write_manifest(user_dir, manifest)
+
+    if len(entry["segments"]) >= COMPACT_SEGMENTS:
+        with _locks_guard:
+            start = dataset_id not in _compacting
+            _compacting.add(dataset_id)
+        if start:
+            threading.Thread(target=_compact_in_background, args=(user_dir, dataset_id), daemon=True).start()
+    return entry
+
+
+def _compact_in_background(user_dir, dataset_id):
+    try:
+        compact_dataset(user_dir, dataset_id)
+    finally:
+        with _locks_guard:
+            _compacting.discard(dataset_id)
+
+
+def list_datasets(user_dir):
+    """Return the manifest entries of a user, newest first."""
+    return list(_catalog(user_dir))
+
+
+def search_datasets(user_dir, query="", offset=0, limit=CATALOG_PAGE_SIZE):
+    """Return ``(entries, total)``: one page of the datasets whose name contains ``query``."""
+    entries = _catalog(user_dir)
+    query = query.strip().casefold()
+    if query:
+        entries = [entry for entry in entries if query in entry["name"].casefold()]
+    return entries[offset:offset + limit], len(entries)
+
+
+def get_dataset(user_dir, dataset_id):
+    """Return the manifest entry for a dataset id, or None."""
+    for entry in _catalog(user_dir):
+        if entry["id"] == dataset_id:
+            return entry
+    return None
+
+
+def find_dataset_by_hash(user_dir, data_hash):
+    """Return the manifest entry holding content with the given hash, or None."""
+    for entry in _catalog(user_dir):
+        if _contains_hash(entry, data_hash):
+            return entry
+    return None
+
+
+def _read_segment(user_dir, segment, columns=None):
+    path = Path(user_dir) / DATASETS_DIR / segment["file"]
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def load_dataset(user_dir, dataset_id, columns=None, entry=None):
+    """Load the latest version of a stored dataset, reading only the requested columns."""
+    entry = entry or get_dataset(user_dir, dataset_id)
+    if entry is None:
+        raise KeyError(f"Unknown dataset: {dataset_id}")
+    try:
+        return _load_segments(user_dir, entry, columns)
+    except FileNotFoundError:
+        # A background compaction replaced the segments after the manifest was read
+        return _load_segments(user_dir, get_dataset(user_dir, dataset_id), columns)
+
+
+def _load_segments(user_dir, entry, columns):
+    # The schema comes from all columns, since a subset of them may not show it
+    keys = key_columns(entry["columns"])
+    if columns is not None:
+        # Key columns are needed to resolve upserts between segments
+        columns = [c for c in entry["columns"] if c in columns or c in keys]
+    parts = segments(entry)
+    df = _read_segment(user_dir, parts[0], columns)
+    for segment in parts[1:]:
+        df = apply_delta(df, _read_segment(user_dir, segment, columns), keys)
+    return df
+
+
+def load_delta(user_dir, entry, version):
+    """Return the rows added in ``version`` of a dataset."""
+    for segment in segments(entry):
+        if segment["version"] == version:
+            return _read_segment(user_dir, segment)
+    raise KeyError(f"Dataset {entry['id']} has no segment for version {version}")
+
+
+def compact_dataset(user_dir, dataset_id):
+    """Merge the segments of a dataset into one file without changing its version."""
+    user_dir = Path(user_dir)
+    entry = get_dataset(user_dir, dataset_id)
+    if entry is None or len(segments(entry)) < 2:
+        return
+    merged = segments(entry)
+    df = load_dataset(user_dir, dataset_id, entry=entry)
+    segment, columns = _write_segment(user_dir, df, merged[-1]["hash"], merged[-1]["version"])
+    segment["hashes"] = [h for s in merged for h in [s["hash"], *s.get("hashes", ())]]
+
+    with _lock_for(user_dir):
+        manifest = _read_manifest(user_dir)
+        current = next((e for e in manifest["datasets"] if e["id"] == dataset_id), None)
+        if current is None:
+            (user_dir / DATASETS_DIR / segment["file"]).unlink()
+            return
+        # Segments appended while compacting stay as they are
+        newer = [s for s in segments(current) if s["version"] > segment["version"]]
+        current["segments"] = [segment] + newer
+        current["rows"] = segment["rows"] + sum(s["rows"] for s in newer)
+        _update_catalog_fields(current)
+        _write_manifest(user_dir, manifest)
+
+    for old in merged:
+        (user_dir / DATASETS_DIR / old["file"]).unlink(missing_ok=True)
+
+
+def migrate_csv_snapshots(user_dir):
+    """Import legacy ``data_*.csv`` snapshots into the columnar store once.
+
+    Imported files are renamed to ``*.csv.migrated`` rather than deleted.
+    """
+    user_dir = Path(user_dir)
+    if _manifest_path(user_dir).exists() or not user_dir.is_dir():
+        return
+    for csv_path in sorted(user_dir.glob("data_*.csv")):
+        df = pd.read_csv(csv_path)
+        # Keep the original snapshot time instead of the migration time
+        created = datetime.fromtimestamp(csv_path.stat().st_mtime)
+        save_dataset(user_dir, df, csv_path.name, created=created, data_hash=content_hash(csv_path.read_bytes()))
+        csv_path.rename(csv_path.with_name(csv_path.name + ".migrated"))
+    if not _manifest_path(user_dir).exists():
+        _write_manifest(user_dir, {"datasets": []})
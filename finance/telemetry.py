@@ -0,0 +1,164 @@
+"""Timing instrumentation for reruns of the Streamlit script.
+
+Code on the hot path is wrapped in :func:`span`. Every finished span is
+
+* logged as one JSON line on the ``finance.telemetry`` logger, which
+  :func:`configure_logging` writes to stderr when ``FINANCE_TELEMETRY_LOG``
+  names a level such as ``INFO``,
+* added to process-wide per-span counters exported by :func:`openmetrics_text`,
+* recorded in the trace of the current rerun, which :func:`end_rerun` appends
+  to the last ``HISTORY_SIZE`` reruns kept in the session state.
+
+Fragments rerunning on their own are traced as reruns of their own by
+:func:`fragment_rerun`; spans outside any rerun only reach the log and counters.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+HISTORY_SIZE = 20
+# Level of the span and rerun log lines, e.g. INFO; empty leaves logging unconfigured
+LOG_LEVEL = os.environ.get("FINANCE_TELEMETRY_LOG", "")
+
+logger = logging.getLogger("finance.telemetry")
+
+_current = contextvars.ContextVar("finance_rerun_trace", default=None)
+_totals = defaultdict(lambda: [0, 0.0])
+_totals_lock = threading.Lock()
+
+
+def configure_logging(level=LOG_LEVEL):
+    """Write the log lines to stderr at ``level``; does nothing without a level or once done.
+
+    Spans and reruns are logged at INFO, below Python's default WARNING threshold.
+    """
+    if not level or logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    # The lines are JSON already; keep them out of handlers of the root logger
+    logger.propagate = False
+
+
+def _record(name, labels, seconds):
+    with _totals_lock:
+        entry = _totals[(name, tuple(sorted(labels.items())))]
+        entry[0] += 1
+        entry[1] += seconds
+
+
+@contextmanager
+def span(name, **labels):
+    """Time the enclosed block as span ``name`` with optional string ``labels``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _record(name, labels, seconds)
+        attach(name, seconds, **labels)
+        logger.info(json.dumps({"event": "span", "span": name, "seconds": round(seconds, 6), **labels}, ensure_ascii=False))
+
+
+def attach(name, seconds, **labels):
+    """Add ``seconds`` to span ``name`` of the current rerun's trace only.
+
+    For work timed elsewhere, e.g. a background job whose own span was
+    counted on its thread, shown by a later rerun.
+    """
+    trace = _current.get()
+    if trace is not None:
+        label = name if not labels else f"{name}[{','.join(map(str, labels.values()))}]"
+        trace["spans"][label] = trace["spans"].get(label, 0.0) + seconds
+
+
+def begin_rerun(state):
+    """Start the trace of a rerun; a previous rerun that never reached ``end_rerun`` is closed first."""
+    if state.get("telemetry_trace") is not None:
+        end_rerun(state, completed=False)
+    trace = {"started": time.time(), "start": time.perf_counter(), "labels": {}, "spans": {}}
+    state["telemetry_trace"] = trace
+    _current.set(trace)
+
+
+def annotate(**labels):
+    """Attach labels such as the active page to the current rerun."""
+    trace = _current.get()
+    if trace is not None:
+        trace["labels"].update(labels)
+
+
+def end_rerun(state, completed=True):
+    """Finish the current rerun and keep its breakdown in ``state['telemetry_history']``."""
+    trace = state.get("telemetry_trace")
+    if trace is None:
+        return
+    state["telemetry_trace"] = None
+    _current.set(None)
+    seconds = time.perf_counter() - trace["start"]
+    record = {
+        "started": trace["started"],
+        "seconds": seconds,
+        "completed": completed,
+        **trace["labels"],
+        "spans": trace["spans"],
+    }
+    history = state.setdefault("telemetry_history", [])
+    history.append(record)
+    del history[:-HISTORY_SIZE]
+    _record("rerun", {}, seconds)
+    logger.info(json.dumps({"event": "rerun", "seconds": round(seconds, 6), "completed": completed, **trace["labels"]}, ensure_ascii=False))
+
+
+@contextmanager
+def fragment_rerun(state, name):
+    """Trace a fragment that reruns without the rest of the page as a rerun of its own.
+
+    Inside a full rerun the fragment's spans stay in that rerun's trace.
+    """
+    if state.get("telemetry_trace") is not None:
+        yield
+        return
+    begin_rerun(state)
+    annotate(fragment=name)
+    try:
+        yield
+    except BaseException:
+        # Including st.rerun() and st.stop(), which raise
+        end_rerun(state, completed=False)
+        raise
+    end_rerun(state)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def openmetrics_text():
+    """Return the per-span totals of this process in OpenMetrics text format."""
+    with _totals_lock:
+        totals = sorted(_totals.items())
+    lines = [
+        "# TYPE finance_span_seconds summary",
+        "# UNIT finance_span_seconds seconds",
+        "# HELP finance_span_seconds Time spent in instrumented code paths.",
+    ]
+    for (name, labels), (count, total) in totals:
+        label_text = ",".join([f'span="{_escape(name)}"'] + [f'{key}="{_escape(value)}"' for key, value in labels])
+        lines.append(f"finance_span_seconds_count{{{label_text}}} {count}")
+        lines.append(f"finance_span_seconds_sum{{{label_text}}} {total:.6f}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def is_admin(username):
+    """Return True if ``username`` is listed in the comma-separated ``FINANCE_ADMINS``."""
+    admins = {name.strip() for name in os.environ.get("FINANCE_ADMINS", "").split(",") if name.strip()}
+    return username in admins
@@ -0,0 +1,345 @@
+"""Localized Markdown rendering of analysis results.
+
+Report texts are format strings kept per locale in ``TEXTS`` and parsed once
+at import into :class:`Template` objects, so rendering only formats the
+fields of a :mod:`finance.results` record. Results are rendered when a page
+displays them, in whatever locale the reader picked, and the last renderings
+are cached; switching the locale never reruns the analysis.
+"""
+import string
+import textwrap
+from functools import lru_cache
+
+from finance.results import FinancialAnalysis, ForecastAnalysis, UnitEconomicsAnalysis
+
+DEFAULT_LOCALE = "ru"
+LOCALE_NAMES = {"ru": "Русский", "en": "English"}
+
+MONTHS = {
+    "ru": ["Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+           "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"],
+    "en": ["January", "February", "March", "April", "May", "June",
+           "July", "August", "September", "October", "November", "December"],
+}
+
+TEXTS = {
+    "ru": {
+        "trend.revenue.up": "растет",
+        "trend.revenue.down": "падает",
+        "trend.costs.up": "растут",
+        "trend.costs.down": "падают",
+        "trend.profit.up": "растет",
+        "trend.profit.down": "падает",
+        "list.more": "{items} и еще {rest}",
+        "series.Revenue": "выручка",
+        "series.Costs": "затраты",
+        "series.Profit": "прибыль",
+        "recommendations.empty": "На основе текущих данных особых рекомендаций нет. Показатели в норме.",
+        "financial.summary": """
+            ## Общий анализ финансовых показателей:
+
+            За анализируемый период выручка **{revenue_trend}** на **{revenue_growth:.1f}%**,
+            затраты **{costs_trend}** на **{costs_growth:.1f}%**,
+            прибыль **{profit_trend}** на **{profit_growth:.1f}%**.
+
+            Средняя маржинальность бизнеса составляет **{avg_margin:.1f}%**.
+
+            Самый прибыльный месяц - **{best_month}**
+            с выручкой **{best_month_revenue:,.0f}** и прибылью **{best_month_profit:,.0f}**.
+            """,
+        "financial.seasonality": """
+            ## Анализ сезонности:
+
+            {season_effect}
+            Средняя выручка за летние месяцы: **{summer_avg:,.0f}**
+            Средняя выручка за зимние месяцы: **{winter_avg:,.0f}**
+            """,
+        "financial.season.summer": "Заметна летняя сезонность: выручка в летние месяцы выше.",
+        "financial.season.winter": "Заметна зимняя сезонность: выручка в зимние месяцы выше.",
+        "financial.season.none": "Явная сезонность не выявлена.",
+        "financial.season.shape": "Сезонная составляющая объясняет **{seasonal_strength:.0%}** колебаний выручки без учета тренда; пик сезона - **{peak_month}**, спад - **{trough_month}**.",
+        "financial.recommendations": """
+            ## Рекомендации:
+
+            {bullets}
+            """,
+        "financial.rec.costs_outpace_revenue": "Обратите внимание на рост затрат. Темп роста затрат превышает темп роста выручки, что может негативно сказаться на прибыли в будущем.",
+        "financial.rec.low_margin": "Рекомендуется проработать стратегию повышения маржинальности бизнеса, текущий показатель ниже среднего по рынку.",
+        "financial.rec.loss_months": "Выявлены убыточные месяцы: {loss_months}. Проанализируйте причины и разработайте меры по предотвращению убытков.",
+        "financial.rec.anomalies": "Выявлены отклонения, которые не объясняются трендом и сезонностью: {anomalies}. Проверьте эти месяцы на разовые события и ошибки учета.",
+        "financial.rec.seasonal_plan": "Выручка сильно зависит от сезона (пик - {peak_month}, спад - {trough_month}). Заранее планируйте запасы, персонал и резерв денежных средств на период спада.",
+        "financial.anomaly": "{series} за {month}: {value:,.0f} при ожидаемых {expected:,.0f}",
+        "unit_economics.summary": """
+            ## Анализ юнит-экономики:
+
+            Средняя цена продукта составляет **{avg_price:.2f}**, при средней марже **{avg_margin_pct:.1f}%**.
+
+            Продукт с наибольшей маржинальностью - **{best_margin_product}** (**{best_margin_pct:.1f}%**).
+            Продукт с наименьшей маржинальностью - **{worst_margin_product}** (**{worst_margin_pct:.1f}%**).
+
+            Самый прибыльный продукт - **{best_profit_product}** с общей прибылью **{best_profit:,.0f}**.
+            Наименее прибыльный продукт - **{worst_profit_product}** с общей прибылью **{worst_profit:,.0f}**.
+            """,
+        "unit_economics.group": """
+            По {level} ({count}): лидер по прибыли - **{best}** (**{best_profit:,.0f}**, маржа **{best_margin_pct:.1f}%**),
+            наименьшая прибыль - **{worst}** (**{worst_profit:,.0f}**).
+            """,
+        "unit_economics.level.Entity": "юрлицам",
+        "unit_economics.level.Category": "категориям",
+        "unit_economics.recommendations": """
+            ## Рекомендации по улучшению юнит-экономики:
+
+            {bullets}
+            """,
+        "unit_economics.rec.low_margin_products": "Рассмотрите возможность повышения цен или снижения себестоимости для продуктов с низкой маржинальностью: {products}",
+        "unit_economics.rec.low_volume_high_margin": "Увеличьте маркетинговые усилия для продуктов с высокой маржой, но низкими продажами: {products}",
+        "forecasts.summary": """
+            ## Анализ прогнозных сценариев:
+
+            За прогнозный период в {periods} месяцев ожидается следующий рост выручки:
+            - Консервативный сценарий: **{conservative_growth:.1f}%** (среднемесячный рост: **{conservative_monthly:.2f}%**)
+            - Базовый сценарий: **{base_growth:.1f}%** (среднемесячный рост: **{base_monthly:.2f}%**)
+            - Оптимистичный сценарий: **{optimistic_growth:.1f}%** (среднемесячный рост: **{optimistic_monthly:.2f}%**)
+
+            К концу прогнозного периода разница между оптимистичным и консервативным сценариями составляет **{spread:.1f}%**.
+            """,
+        "forecasts.recommendations": """
+            ## Рекомендации на основе прогнозов:
+
+            {bullets}
+            """,
+        "forecasts.recommendations.empty": "На основе текущих прогнозов особых рекомендаций нет. Показатели в норме.",
+        "forecasts.rec.slow_growth": "Базовый сценарий роста довольно консервативный. Рассмотрите возможности для более активного развития бизнеса.",
+        "forecasts.rec.fast_growth": "Прогнозируемые темпы роста очень высоки. Убедитесь, что у вас достаточно ресурсов для масштабирования и управления таким ростом.",
+        "forecasts.rec.wide_spread": "Большой разрыв между сценариями ({risk_gap:.1f}%) указывает на высокую неопределенность. Разработайте детальные планы действий для каждого сценария.",
+    },
+    "en": {
+        "trend.revenue.up": "grew",
+        "trend.revenue.down": "fell",
+        "trend.costs.up": "grew",
+        "trend.costs.down": "fell",
+        "trend.profit.up": "grew",
+        "trend.profit.down": "fell",
+        "list.more": "{items} and {rest} more",
+        "series.Revenue": "revenue",
+        "series.Costs": "costs",
+        "series.Profit": "profit",
+        "recommendations.empty": "No specific recommendations based on the current data. The figures look healthy.",
+        "financial.summary": """
+            ## Financial performance overview:
+
+            Over the period revenue **{revenue_trend}** by **{revenue_growth:.1f}%**,
+            costs **{costs_trend}** by **{costs_growth:.1f}%**,
+            profit **{profit_trend}** by **{profit_growth:.1f}%**.
+
+            The average margin is **{avg_margin:.1f}%**.
+
+            The most profitable month was **{best_month}**
+            with revenue of **{best_month_revenue:,.0f}** and profit of **{best_month_profit:,.0f}**.
+            """,
+        "financial.seasonality": """
+            ## Seasonality:
+
+            {season_effect}
+            Average revenue in summer months: **{summer_avg:,.0f}**
+            Average revenue in winter months: **{winter_avg:,.0f}**
+            """,
+        "financial.season.summer": "Revenue is noticeably higher in summer.",
+        "financial.season.winter": "Revenue is noticeably higher in winter.",
+        "financial.season.none": "No clear seasonality.",
+        "financial.season.shape": "The season explains **{seasonal_strength:.0%}** of the detrended variation in revenue, peaking in **{peak_month}** with a low in **{trough_month}**.",
+        "financial.recommendations": """
+            ## Recommendations:
+
+            {bullets}
+            """,
+        "financial.rec.costs_outpace_revenue": "Watch the growth of costs. Costs are growing faster than revenue, which may hurt profit in the future.",
+        "financial.rec.low_margin": "Work out a strategy to raise the margin; it is below the market average.",
+        "financial.rec.loss_months": "Loss-making months found: {loss_months}. Analyse the causes and plan measures to prevent losses.",
+        "financial.rec.anomalies": "Found deviations that the trend and the season do not explain: {anomalies}. Check these months for one-off events and bookkeeping errors.",
+        "financial.rec.seasonal_plan": "Revenue depends strongly on the season (peak in {peak_month}, low in {trough_month}). Plan stock, staffing and cash reserves for the low season in advance.",
+        "financial.anomaly": "{series} in {month}: {value:,.0f} against {expected:,.0f} expected",
+        "unit_economics.summary": """
+            ## Unit economics overview:
+
+            The average product price is **{avg_price:.2f}** with an average margin of **{avg_margin_pct:.1f}%**.
+
+            Highest margin product: **{best_margin_product}** (**{best_margin_pct:.1f}%**).
+            Lowest margin product: **{worst_margin_product}** (**{worst_margin_pct:.1f}%**).
+
+            Most profitable product: **{best_profit_product}** with a total profit of **{best_profit:,.0f}**.
+            Least profitable product: **{worst_profit_product}** with a total profit of **{worst_profit:,.0f}**.
+            """,
+        "unit_economics.group": """
+            By {level} ({count}): the most profitable is **{best}** (**{best_profit:,.0f}**, margin **{best_margin_pct:.1f}%**),
+            the least profitable is **{worst}** (**{worst_profit:,.0f}**).
+            """,
+        "unit_economics.level.Entity": "legal entity",
+        "unit_economics.level.Category": "category",
+        "unit_economics.recommendations": """
+            ## Recommendations for unit economics:
+
+            {bullets}
+            """,
+        "unit_economics.rec.low_margin_products": "Consider raising prices or cutting costs for low-margin products: {products}",
+        "unit_economics.rec.low_volume_high_margin": "Step up marketing for high-margin products with low sales: {products}",
+        "forecasts.summary": """
+            ## Forecast scenarios:
+
+            Expected revenue growth over the {periods}-month forecast horizon:
+            - Conservative scenario: **{conservative_growth:.1f}%** (average monthly growth: **{conservative_monthly:.2f}%**)
+            - Base case: **{base_growth:.1f}%** (average monthly growth: **{base_monthly:.2f}%**)
+            - Optimistic scenario: **{optimistic_growth:.1f}%** (average monthly growth: **{optimistic_monthly:.2f}%**)
+
+            By the end of the horizon the optimistic scenario is **{spread:.1f}%** above the conservative one.
+            """,
+        "forecasts.recommendations": """
+            ## Recommendations based on the forecast:
+
+            {bullets}
+            """,
+        "forecasts.recommendations.empty": "No specific recommendations based on the current forecast. The figures look healthy.",
+        "forecasts.rec.slow_growth": "The base case growth is rather conservative. Look for opportunities to grow the business faster.",
+        "forecasts.rec.fast_growth": "The forecast growth is very high. Make sure you have the resources to scale and manage it.",
+        "forecasts.rec.wide_spread": "The wide gap between scenarios ({risk_gap:.1f}%) signals high uncertainty. Prepare detailed action plans for each scenario.",
+    },
+}
+
+_formatter = string.Formatter()
+
+
+class Template:
+    """A format string parsed once, so rendering only formats its fields."""
+
+    __slots__ = ("source", "parts")
+
+    def __init__(self, source):
+        self.source = textwrap.dedent(source).strip("\n")
+        self.parts = tuple((literal, field, spec) for literal, field, spec, _ in _formatter.parse(self.source))
+
+    def render(self, **values):
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return "".join(out)
+
+
+_TEMPLATES = {
+    locale: {name: Template(source) for name, source in texts.items()}
+    for locale, texts in TEXTS.items()
+}
+
+
+class _Renderer:
+    """Template lookup for one locale."""
+
+    __slots__ = ("locale", "templates")
+
+    def __init__(self, locale):
+        self.locale = locale if locale in _TEMPLATES else DEFAULT_LOCALE
+        self.templates = _TEMPLATES[self.locale]
+
+    def __call__(self, name, **values):
+        return self.templates[name].render(**values)
+
+    def month(self, day):
+        return f"{self.month_name(day.month)} {day.year}"
+
+    def month_name(self, month):
+        return MONTHS[self.locale][month - 1]
+
+    def items(self, names, count, sep=", "):
+        text = sep.join(names)
+        if count > len(names):
+            text = self("list.more", items=text, rest=count - len(names))
+        return text
+
+    def bullets(self, kind, codes, values, empty="recommendations.empty"):
+        if not codes:
+            return f"- {self(empty)}"
+        return "\n".join(f"- {self(f'{kind}.rec.{code}', **values)}" for code in codes)
+
+
+def _fields(result):
+    return {name: getattr(result, name) for name in result.__slots__}
+
+
+def _render_financial(result, t):
+    values = _fields(result)
+    values.update(
+        revenue_trend=t("trend.revenue.up" if result.revenue_up else "trend.revenue.down"),
+        costs_trend=t("trend.costs.up" if result.costs_up else "trend.costs.down"),
+        profit_trend=t("trend.profit.up" if result.profit_up else "trend.profit.down"),
+        best_month=t.month(result.best_month),
+        loss_months=", ".join(t.month(day) for day in result.loss_months),
+        anomalies=t.items(
+            [
+                t("financial.anomaly", series=t(f"series.{a.series}"), month=t.month(a.month), value=a.value, expected=a.expected)
+                for a in result.anomalies
+            ],
+            result.anomaly_count,
+            sep="; ",
+        ),
+    )
+    if result.peak_month is not None:
+        values.update(peak_month=t.month_name(result.peak_month), trough_month=t.month_name(result.trough_month))
+    sections = {"summary": t("financial.summary", **values)}
+    if result.season is not None:
+        season_effect = t(f"financial.season.{result.season}")
+        if result.seasonal_strength is not None:
+            season_effect += " " + t("financial.season.shape", **values)
+        sections["seasonality"] = t("financial.seasonality", season_effect=season_effect, **values)
+    sections["recommendations"] = t("financial.recommendations", bullets=t.bullets("financial", result.recommendations, values))
+    return sections
+
+
+def _render_unit_economics(result, t):
+    values = _fields(result)
+    summary = t("unit_economics.summary", **values)
+    for group in result.groups:
+        name = f"unit_economics.level.{group.level}"
+        level = t(name) if name in t.templates else group.level
+        summary += "\n\n" + t("unit_economics.group", **{**_fields(group), "level": level})
+    products = {
+        "low_margin_products": t.items(result.low_margin_products, result.low_margin_count),
+        "low_volume_high_margin": t.items(result.low_volume_high_margin, result.low_volume_high_margin_count),
+    }
+    bullets = "\n".join(
+        f"- {t(f'unit_economics.rec.{code}', products=products[code])}" for code in result.recommendations
+    ) or f"- {t('recommendations.empty')}"
+    return {
+        "summary": summary,
+        "recommendations": t("unit_economics.recommendations", bullets=bullets),
+    }
+
+
+def _render_forecasts(result, t):
+    values = _fields(result)
+    for key, name in (("conservative", "Conservative"), ("base", "Base Case"), ("optimistic", "Optimistic")):
+        values[f"{key}_growth"] = result.scenario(result.growth, name)
+        values[f"{key}_monthly"] = result.scenario(result.monthly_growth, name)
+    return {
+        "summary": t("forecasts.summary", **values),
+        "recommendations": t(
+            "forecasts.recommendations",
+            bullets=t.bullets("forecasts", result.recommendations, values, empty="forecasts.recommendations.empty"),
+        ),
+    }
+
+
+_RENDERERS = {
+    FinancialAnalysis: _render_financial,
+    UnitEconomicsAnalysis: _render_unit_economics,
+    ForecastAnalysis: _render_forecasts,
+}
+
+
+@lru_cache(maxsize=256)
+def render(result, locale=DEFAULT_LOCALE):
+    """Return the sections of an analysis result as Markdown, keyed by section name.
+
+    The returned dict is cached and shared; treat it as read-only.
+    """
+    return _RENDERERS[type(result)](result, _Renderer(locale))
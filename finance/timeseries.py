@@ -0,0 +1,206 @@
+"""Batched seasonal decomposition and anomaly detection of monthly series.
+
+Series are the rows of one 2-D array on a shared grid of calendar months, so
+every step below is a handful of NumPy operations along the time axis for all
+series at once: the P&L columns of one dataset, or thousands of
+entity/account series, cost about the same number of Python calls.
+
+* :func:`month_grid` and :func:`monthly_sums` turn rows of any frequency into
+  monthly totals with ``np.bincount``; months without rows are NaN.
+  :func:`complete_months` tells an incomplete last month apart.
+* :func:`decompose` splits each series additively into a trend (a centred
+  2x12 moving average, extended linearly over the first and last half
+  year), a seasonal profile (the mean
+  detrended value of each calendar month, once ``MIN_SEASONS`` years are
+  covered) and a residual, and measures how much of the variation the season
+  explains beyond what a profile would fit to noise, like an adjusted R².
+* :func:`anomalies` flags residuals that are both more than ``Z_THRESHOLD``
+  standard deviations from the series mean and outside Tukey's
+  ``IQR_FACTOR`` fences; requiring both keeps single noisy months of short
+  series from being reported.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+SEASON = 12
+# Years of data needed before a seasonal profile is estimated
+MIN_SEASONS = 3
+# Fewer valid months than this are never checked for anomalies
+MIN_PERIODS = 6
+Z_THRESHOLD = 3.0
+IQR_FACTOR = 1.5
+
+
+@dataclass(frozen=True, slots=True)
+class Decomposition:
+    # Arrays shaped like the input; seasonal is zero without enough seasons
+    trend: np.ndarray
+    seasonal: np.ndarray
+    resid: np.ndarray
+    # Share of the detrended variance explained by the season beyond chance (0..1) per series, NaN if unknown
+    strength: np.ndarray
+
+    @property
+    def expected(self):
+        return self.trend + self.seasonal
+
+
+def month_grid(dates):
+    """Return ``(months, positions)``: month-end dates from the first to the last
+    month of ``dates`` and the position of every row among them."""
+    codes = pd.DatetimeIndex(dates).to_numpy().astype("datetime64[M]").astype(np.int64)
+    if len(codes) == 0:
+        return pd.DatetimeIndex([]), codes
+    first, last = codes.min(), codes.max()
+    months = pd.PeriodIndex.from_ordinals(np.arange(first, last + 1), freq="M").to_timestamp(how="end").normalize()
+    return months, codes - first
+
+
+def complete_months(dates):
+    """Return a boolean array marking the rows of ``dates`` outside an incomplete last month.
+
+    The last month is incomplete when the data stops before its end while the
+    month before it reaches its own end, as for P&L data aggregated by
+    :func:`finance.ingest.ingest` or daily ledgers cut mid-month; its rows are
+    then left out of month-to-month comparisons.
+    """
+    dates = pd.DatetimeIndex(dates)
+    complete = np.ones(len(dates), dtype=bool)
+    if len(dates) < 2:
+        return complete
+    last = dates.max()
+    start = last.to_period("M").start_time
+    earlier = dates[dates < start]
+    if last.is_month_end or len(earlier) == 0 or not earlier.max().is_month_end:
+        return complete
+    return np.asarray(dates < start)
+
+
+def monthly_sums(positions, n_months, columns, groups=None, n_groups=1):
+    """Sum each of ``columns`` (1-D arrays aligned with ``positions``) per month.
+
+    With integer ``groups`` codes the sums are also split by group. Returns a
+    ``(n_groups * len(columns), n_months)`` array whose row ``g * len(columns) + j``
+    is column ``j`` of group ``g``; months without rows are NaN.
+    """
+    index = positions if groups is None else groups * n_months + positions
+    size = n_groups * n_months
+    empty = np.bincount(index, minlength=size) == 0
+    sums = np.empty((len(columns), size))
+    for j, values in enumerate(columns):
+        sums[j] = np.bincount(index, weights=values, minlength=size)
+    sums[:, empty] = np.nan
+    # (columns, groups * months) -> (groups * columns, months)
+    return sums.reshape(len(columns), n_groups, n_months).transpose(1, 0, 2).reshape(-1, n_months)
+
+
+def _centered_mean(matrix, period):
+    # Weighted window sums from cumulative sums; NaN and out-of-range months weigh nothing
+    half = period // 2
+    n = matrix.shape[1]
+    valid = ~np.isnan(matrix)
+    pad = ((0, 0), (half, half))
+    values = np.pad(np.where(valid, matrix, 0.0), pad)
+    weights = np.pad(valid.astype(float), pad)
+
+    def window(a):
+        total = np.concatenate([np.zeros((a.shape[0], 1)), np.cumsum(a, axis=1)], axis=1)
+        if period % 2:
+            return total[:, 2 * half + 1:] - total[:, :n]
+        # Even periods: full inner window plus half of each end (the 2xN moving average)
+        return total[:, 2 * half:2 * half + n] - total[:, 1:1 + n] + 0.5 * (a[:, :n] + a[:, 2 * half:])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return window(values) / window(weights)
+
+
+def _trend(matrix, period):
+    trend = _centered_mean(matrix, period)
+    half = period // 2
+    n = matrix.shape[1]
+    if n > 2 * half:
+        # Windows cut by the ends of the series lean towards the inside and pick up
+        # part of the season; continue the nearest full-window slope there instead
+        steps = np.arange(1, half + 1)
+        first, last = trend[:, half], trend[:, n - 1 - half]
+        slope = (trend[:, 2 * half] - first) / half
+        trend[:, :half] = first[:, None] - slope[:, None] * steps[::-1]
+        slope = (last - trend[:, n - 1 - 2 * half]) / half
+        trend[:, n - half:] = last[:, None] + slope[:, None] * steps
+    return trend
+
+
+def _seasonal(detrended, period):
+    rows, n = detrended.shape
+    cycles = -(-n // period)
+    padded = np.full((rows, cycles * period), np.nan)
+    padded[:, :n] = detrended
+    padded = padded.reshape(rows, cycles, period)
+    valid = ~np.isnan(padded)
+    counts = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profile = np.where(valid, padded, 0.0).sum(axis=1) / counts
+        known = counts > 0
+        # Centre the profile so the season adds nothing over a full year
+        centre = np.where(known, profile, 0.0).sum(axis=1) / known.sum(axis=1)
+    profile = np.where(known, profile - centre[:, None], 0.0)
+    return profile[:, np.arange(n) % period]
+
+
+def _nanvar(a):
+    valid = ~np.isnan(a)
+    counts = valid.sum(axis=1)
+    filled = np.where(valid, a, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=1) / counts
+        return np.where(valid, (a - mean[:, None]) ** 2, 0.0).sum(axis=1) / counts
+
+
+def decompose(matrix, period=SEASON):
+    """Decompose every row of ``matrix`` into trend, seasonal and residual parts."""
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    trend = _trend(matrix, period)
+    detrended = matrix - trend
+    if matrix.shape[1] >= MIN_SEASONS * period:
+        seasonal = _seasonal(detrended, period)
+        resid = detrended - seasonal
+        with np.errstate(invalid="ignore", divide="ignore"):
+            explained = 1 - _nanvar(resid) / _nanvar(detrended)
+            # A profile of ``period`` means fits part of pure noise too; discount that share
+            chance = (period - 1) / ((~np.isnan(resid)).sum(axis=1) - 1)
+            strength = np.clip((explained - chance) / (1 - chance), 0, 1)
+    else:
+        seasonal = np.zeros_like(matrix)
+        resid = detrended
+        strength = np.full(matrix.shape[0], np.nan)
+    return Decomposition(trend=trend, seasonal=seasonal, resid=resid, strength=strength)
+
+
+def anomalies(matrix, decomposition=None):
+    """Return ``(mask, scores)``: which months of each row of ``matrix`` are anomalous,
+    and the z-scores of their residuals (NaN where not computed)."""
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    if decomposition is None:
+        decomposition = decompose(matrix)
+    resid = decomposition.resid
+    mask = np.zeros(resid.shape, dtype=bool)
+    scores = np.full(resid.shape, np.nan)
+    rows = np.flatnonzero((~np.isnan(resid)).sum(axis=1) >= MIN_PERIODS)
+    if len(rows) == 0:
+        return mask, scores
+
+    resid = resid[rows]
+    mean = np.nanmean(resid, axis=1, keepdims=True)
+    std = np.nanstd(resid, axis=1, keepdims=True)
+    # nanpercentile sorts row by row in Python; without gaps one vectorized percentile does
+    percentile = np.nanpercentile if np.isnan(resid).any() else np.percentile
+    q1, q3 = percentile(resid, [25, 75], axis=1, keepdims=True)
+    fence = IQR_FACTOR * (q3 - q1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (resid - mean) / std
+    outside = (resid < q1 - fence) | (resid > q3 + fence)
+    mask[rows] = (np.abs(z) > Z_THRESHOLD) & outside & (std > 0)
+    scores[rows] = z
+    return mask, scores
@@ -0,0 +1,114 @@
+"""SQLite-backed user accounts.
+
+Replaces the ``users.json`` file that was read and rewritten in full on every
+login and registration. The database runs in WAL mode so logins never block
+on a registration, usernames are the primary key (an index lookup instead of
+a full load), and registering is a single INSERT so two sessions racing for
+the same name cannot overwrite each other. Connections are pooled and shared
+by every Streamlit session in the process.
+"""
+import hmac
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+DB_NAME = "users.db"
+POOL_SIZE = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    created TEXT NOT NULL
+)
+"""
+
+
+class UserStore:
+    """Pooled SQLite user database."""
+
+    def __init__(self, path, pool_size=POOL_SIZE):
+        self.path = Path(path)
+        self._pool = queue.LifoQueue()
+        self._pool_size = pool_size
+        self._opened = 0
+        self._lock = threading.Lock()
+        with self.connection() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool, opening one if the pool is not full yet."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self._pool_size
+                if can_open:
+                    self._opened += 1
+            conn = self._connect() if can_open else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def create_user(self, username, password_hash):
+        """Add a user; return False if the username is already taken."""
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                    (username, password_hash, datetime.now().isoformat(timespec="seconds")),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def verify_user(self, username, password_hash):
+        """Check if the user exists and the password hash matches."""
+        with self.connection() as conn:
+            row = conn.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+        return row is not None and hmac.compare_digest(row[0], password_hash)
+
+    def import_json(self, json_path):
+        """Import accounts from a legacy ``users.json`` and rename the file."""
+        json_path = Path(json_path)
+        with open(json_path, "r") as f:
+            users = json.load(f)
+        created = datetime.fromtimestamp(json_path.stat().st_mtime).isoformat(timespec="seconds")
+        # The inner ``conn`` context commits the import, or rolls it back on error
+        with self.connection() as conn, conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                [(username, password_hash, created) for username, password_hash in users.items()],
+            )
+        json_path.rename(json_path.with_name(json_path.name + ".migrated"))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_user_store(data_dir):
+    """Return the process-wide store for ``data_dir``, migrating ``users.json`` once."""
+    data_dir = Path(data_dir)
+    with _stores_lock:
+        store = _stores.get(data_dir)
+        if store is None:
+            store = UserStore(data_dir / DB_NAME)
+            legacy = data_dir / "users.json"
+            if legacy.exists():
+                store.import_json(legacy)
+            _stores[data_dir] = store
+        return store
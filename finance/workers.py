@@ -0,0 +1,158 @@
+"""Process-pool execution of analyses and forecasts.
+
+Heavy work is sent to a process pool shared by all sessions so it can use
+every core and does not hold the GIL of the Streamlit server. The numeric
+columns of an input frame are copied once into a shared-memory block and the
+workers map them without pickling; only the small result comes back.
+
+A single task is not faster in the pool: copying the columns, pickling text
+columns and fingerprinting again in the worker cost about as much as the
+analysis itself. The pool is worth it only for inputs large enough to hold
+the server's GIL noticeably, and only with more than one worker. Uploaded
+P&L files are monthly aggregates and catalogs are one row per product, so in
+practice the pool serves large catalogs, unaggregated pass-through or sample
+frames and large forecasts; everything else is computed inline.
+
+Sessions do not wait on these futures directly; :mod:`finance.jobs` runs them
+as background jobs.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from finance import analysis, forecasting
+from finance.cache import FrameMemo
+
+# Inputs below these sizes are computed inline. Measured on one core, the pool
+# took about twice the inline time at every size from 1k to 1M rows; at 100k
+# rows a unit economics analysis holds the server for ~150 ms inline.
+POOL_MIN_ROWS = 100_000
+POOL_MIN_CELLS = 5_000_000
+
+MAX_WORKERS = int(os.environ.get("FINANCE_WORKERS", os.cpu_count() or 1))
+# With a single worker the pool only adds its overhead
+USE_POOL = MAX_WORKERS > 1
+
+_TASKS = {
+    "financial": analysis.analyze_financial_data,
+    "unit_economics": analysis.analyze_unit_economics,
+    "forecasts": analysis.analyze_forecasts,
+    "scenarios": forecasting.generate_scenarios,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_results = FrameMemo()
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame whose numeric columns live in shared memory."""
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        arrays = {}
+        for column in self.columns:
+            values = df[column].to_numpy()
+            if values.dtype.kind in "biufmM":
+                arrays[column] = np.ascontiguousarray(values)
+
+        self.layout = []
+        offset = 0
+        for column, values in arrays.items():
+            self.layout.append((column, values.dtype.str, offset, len(values)))
+            offset += values.nbytes
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.name = self._shm.name
+        for (column, dtype, start, length), values in zip(self.layout, arrays.values()):
+            np.ndarray(length, dtype=dtype, buffer=self._shm.buf, offset=start)[:] = values
+
+        # Text and other object columns are pickled along with the handle
+        self.objects = df[[c for c in self.columns if c not in arrays]]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    def attach(self):
+        """Map the shared block in a worker and return ``(df, shm)``; close ``shm`` when done."""
+        # Pool workers share the parent's resource tracker, so attaching here
+        # does not take ownership; the parent unlinks the block in release()
+        shm = shared_memory.SharedMemory(name=self.name)
+        data = {
+            column: np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)
+            for column, dtype, start, length in self.layout
+        }
+        for column in self.objects.columns:
+            data[column] = self.objects[column].to_numpy()
+        df = pd.DataFrame({column: data[column] for column in self.columns}, copy=False)
+        return df, shm
+
+    def release(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _run_shared(kind, shared, kwargs):
+    df, shm = shared.attach()
+    try:
+        return _TASKS[kind](df, **kwargs)
+    finally:
+        del df
+        shm.close()
+
+
+def _run(kind, kwargs):
+    return _TASKS[kind](**kwargs)
+
+
+def get_pool():
+    """Return the process pool shared by every session, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a threaded server is unsafe; start workers from a clean interpreter
+            _pool = ProcessPoolExecutor(MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _completed(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def submit(kind, df=None, **kwargs):
+    """Run task ``kind`` on ``df`` (or on keyword arguments only) and return a Future."""
+    if df is None:
+        if not USE_POOL or kwargs.get("paths", forecasting.DEFAULT_PATHS) * kwargs.get("periods", 12) < POOL_MIN_CELLS:
+            return _completed(_TASKS[kind](**kwargs))
+        return get_pool().submit(_run, kind, kwargs)
+
+    cached = _results.get(kind, df)
+    if cached is not None:
+        return _completed(cached)
+    if not USE_POOL or len(df) < POOL_MIN_ROWS:
+        result = _TASKS[kind](df, **kwargs)
+        _results.put(kind, df, result)
+        return _completed(result)
+
+    shared = SharedFrame(df)
+    future = get_pool().submit(_run_shared, kind, shared, kwargs)
+
+    def done(f):
+        shared.release()
+        if not f.cancelled() and f.exception() is None:
+            _results.put(kind, df, f.result())
+
+    future.add_done_callback(done)
+    return future
@@ -0,0 +1,12 @@
+import pandas as pd
+
+from finance.consolidation import ProductIndex
+
+
+def test_repeated_products_get_labels_and_positions_of_their_own():
+    df = pd.DataFrame({"Product": ["Widget", "Gadget", "Widget"], "Price": [1.0, 2.0, 3.0]})
+    index = ProductIndex(df)
+
+    assert index.labels.tolist() == ["Widget", "Gadget", "Widget (2)"]
+    assert df.iloc[index.position("Widget (2)")]["Price"] == 3.0
+    assert index.position("Widget") == 0
@@ -0,0 +1,38 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from finance import analysis, ingest, rollups, storage
+
+
+def _ledger(start, end):
+    dates = pd.date_range(start, end, freq="D")
+    df = pd.DataFrame({"Date": dates, "Revenue": np.full(len(dates), 1000.0), "Costs": np.full(len(dates), 600.0)})
+    return io.BytesIO(df.to_csv(index=False).encode())
+
+
+def test_incomplete_last_month_is_dated_at_its_last_day():
+    df, stats = ingest.ingest(_ledger("2024-01-01", "2024-06-14"), "ledger.csv")
+
+    assert df["Date"].iloc[-2] == pd.Timestamp("2024-05-31")
+    assert df["Date"].iloc[-1] == pd.Timestamp("2024-06-14")
+    assert stats["partial_through"] == pd.Timestamp("2024-06-14")
+
+
+def test_incomplete_last_month_is_not_compared_with_full_months():
+    df, _ = ingest.ingest(_ledger("2024-01-01", "2024-06-14"), "ledger.csv")
+
+    # January and May have the same number of days
+    assert analysis.financial_metrics(df)["revenue_growth"] == 0
+    assert rollups.Rollups.build(df).kpis()["Revenue"]["change_pct"] == 0
+
+
+def test_complete_month_replaces_its_incomplete_version():
+    history, _ = ingest.ingest(_ledger("2024-01-01", "2024-06-14"), "ledger.csv")
+    delta, stats = ingest.ingest(_ledger("2024-06-01", "2024-06-30"), "june.csv")
+
+    combined = storage.apply_delta(history, delta)
+    assert stats["partial_through"] is None
+    assert combined["Date"].iloc[-1] == pd.Timestamp("2024-06-30")
+    assert len(combined) == len(history)
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from finance import storage
+
+
+def _frame(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def test_append_keeps_rows_sharing_a_date_in_passthrough_data(tmp_path):
+    columns = ["Date", "Account", "Amount"]
+    history = _frame([("2024-01-31", "Sales", 100.0), ("2024-01-31", "Rent", -40.0), ("2024-02-29", "Sales", 120.0)], columns)
+    delta = _frame([("2024-02-29", "Rent", -40.0), ("2024-03-31", "Sales", 90.0)], columns)
+
+    entry = storage.save_dataset(tmp_path, history, "ledger")
+    storage.append_to_dataset(tmp_path, entry["id"], delta)
+
+    df = storage.load_dataset(tmp_path, entry["id"])
+    assert len(df) == 5
+    assert df["Date"].is_monotonic_increasing
+
+
+def test_append_keeps_repeated_dates_of_unaggregated_financial_data(tmp_path):
+    columns = ["Date", "Revenue", "Costs"]
+    history = _frame([("2024-01-05", 10.0, 4.0), ("2024-01-05", 20.0, 8.0)], columns)
+    delta = _frame([("2024-01-05", 30.0, 12.0)], columns)
+
+    entry = storage.save_dataset(tmp_path, history, "migrated.csv")
+    storage.append_to_dataset(tmp_path, entry["id"], delta)
+
+    assert len(storage.load_dataset(tmp_path, entry["id"])) == 3
+
+
+def test_append_replaces_months_of_aggregated_financial_data(tmp_path):
+    columns = ["Date", "Revenue", "Costs", "Profit"]
+    history = _frame([("2024-01-31", 100.0, 60.0, 40.0), ("2024-02-29", 110.0, 70.0, 40.0)], columns)
+    delta = _frame([("2024-02-29", 150.0, 70.0, 80.0), ("2024-03-31", 120.0, 65.0, 55.0)], columns)
+
+    entry = storage.save_dataset(tmp_path, history, "pnl")
+    storage.append_to_dataset(tmp_path, entry["id"], delta)
+
+    df = storage.load_dataset(tmp_path, entry["id"])
+    assert df["Revenue"].tolist() == [100.0, 150.0, 120.0]
+    # A column subset no longer looks like the financial schema but is still upserted
+    assert storage.load_dataset(tmp_path, entry["id"], columns=["Revenue"])["Revenue"].tolist() == [100.0, 150.0, 120.0]